@@ -64,6 +64,10 @@ else:
     dbString = 'sqlite:///volumes/'
     dbURI = dbString + dbName + '.db'
     backupURI = dbString + dbName + '_bak.db'
+# A database URI in the environment, e.g. a throwaway SQLite file for the tests, takes precedence
+if os.environ.get('DATABASE_URI'):
+    dbURI = os.environ['DATABASE_URI']
+    backupURI = None
 
 app.config['DB_ENDPOINT'] = DB_ENDPOINT
 app.config['DB_USERNAME'] = DB_USERNAME
@@ -81,6 +85,10 @@ app.config['MAX_CONTENT_LENGTH'] = 5 * 1024 * 1024  # maximum size of uploaded c
 app.config['UPLOAD_EXTENSIONS'] = ['.jpg', '.png', '.gif']  # supported file types
 app.config['UPLOAD_FOLDER'] = os.path.join(app.instance_path, 'uploads')
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+app.config['FOOD_IMAGE_FOLDER'] = os.environ.get('FOOD_IMAGE_FOLDER') or os.path.join(app.static_folder, 'images', 'food')
+
+# Leaderboard settings
+app.config['LEADERBOARD_SUBMIT_INTERVAL'] = 5  # minimum seconds between results from the same player
 
 # GITHUB settings
 app.config['GITHUB_API_URL'] = 'https://api.github.com'
@@ -0,0 +1,52 @@
+import os
+from flask import Blueprint, request, send_file
+from flask_restful import Api, Resource
+from model.blob import IMMUTABLE, blob_path, is_blob
+from model.thumbnail import SIZES, best_variant
+
+"""
+This Blueprint object is used to define the API for images in the content-addressed blob store.
+- This Blueprint is registered to the Flask app in main.py.
+"""
+blob_api = Blueprint('blob_api', __name__, url_prefix='/api/blob')
+api = Api(blob_api)
+
+class BlobAPI:
+    """
+    Define the read-only endpoint for stored images.
+    """
+    class _BLOB(Resource):
+        def get(self, name):
+            """
+            Serve a stored image, or one of its thumbnails with ?size=64, 256 or 1024.
+
+            A blob is named after the hash of its content, so the response for a name never changes and is marked
+            to be cached for a year without revalidation. A thumbnail that is still being generated is answered
+            with the original image and no-cache instead, so clients ask again once it exists.
+            """
+            size = request.args.get('size', type=int)
+            if 'size' in request.args and size not in SIZES:
+                return {'message': f'Size must be one of {", ".join(map(str, SIZES))}.'}, 400
+            if not is_blob(name):
+                return {'message': 'Image not found.'}, 404
+
+            path = blob_path(name)
+            if not os.path.exists(path):
+                return {'message': 'Image not found.'}, 404
+            img_path = best_variant(path, size)
+
+            # The original keeps its own entity tag when it stands in for a thumbnail, so once the thumbnail exists
+            # a revalidation no longer matches and the client gets the thumbnail instead of a 304
+            digest = name.split('.')[0]
+            thumbnail = img_path != path
+            response = send_file(img_path, etag=f'{digest}-{size}' if thumbnail else digest, conditional=True)
+            if not thumbnail and size:
+                response.headers['Cache-Control'] = 'no-cache'
+            else:
+                response.headers['Cache-Control'] = IMMUTABLE
+            return response
+
+    """
+    Map class to API endpoints.
+    """
+    api.add_resource(_BLOB, '/<string:name>')
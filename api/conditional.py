@@ -0,0 +1,34 @@
+from flask import current_app, request
+
+def is_fresh(etag):
+    """
+    Checks whether the client already holds the representation identified by the entity tag.
+
+    Args:
+        etag (str): The entity tag of the current representation, without quotes.
+
+    Returns:
+        bool: True if the request's If-None-Match header matches the entity tag.
+    """
+    return request.if_none_match.contains_weak(etag)
+
+def not_modified(etag):
+    """
+    Builds an empty 304 response for a client whose cached copy is still current.
+    """
+    return with_etag(current_app.response_class(status=304), etag)
+
+def with_etag(response, etag):
+    """
+    Attaches a weak entity tag to a response and asks clients to revalidate it before reuse.
+
+    Args:
+        response (Response): The response to decorate.
+        etag (str): The entity tag of the representation, without quotes.
+
+    Returns:
+        Response: The same response with ETag and Cache-Control headers set.
+    """
+    response.set_etag(etag, weak=True)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
@@ -5,6 +5,7 @@ from datetime import datetime
 from __init__ import app
 from api.jwt_authorize import token_required
 from model.feedback import Feedback
+from model.post import Post
 
 """
 This Blueprint object is used to define APIs for the Feedback model.
@@ -35,10 +36,24 @@ class FeedbackAPI:
         def post(self):
             # Obtain the current user from the token required setting in the global context
             current_user = g.current_user
-            # Obtain the request data sent by the RESTful client API
+            # Obtain and validate the request data sent by the RESTful client API
             data = request.get_json()
+            if not data or not data.get('content'):
+                return {'message': 'Feedback content is required'}, 400
+            # Ids may be sent as numbers or numeric strings, compare them as integers
+            try:
+                post_id = int(data.get('post_id'))
+                parent_id = int(data['parent_id']) if data.get('parent_id') is not None else None
+            except (TypeError, ValueError):
+                return {'message': 'Post ID and parent ID must be integers'}, 400
+            if Post.query.get(post_id) is None:
+                return {'message': 'Post not found'}, 404
+            if parent_id is not None:
+                parent = Feedback.query.get(parent_id)
+                if parent is None or parent._post_id != post_id:
+                    return {'message': 'Parent feedback not found on this post'}, 404
             # Create a new feedback object using the data from the request
-            feedback = feedback(data['content'], data['post_id'], current_user.id)
+            feedback = Feedback(data['content'], current_user.id, post_id, parent_id)
             # Save the feedback object using the Object Relational Mapper (ORM) method defined in the model
             feedback.create()
             # Return response to the client in JSON format, converting Python dictionaries to JSON format
@@ -46,15 +61,21 @@ class FeedbackAPI:
 
         @token_required()
         def get(self):
-            # Obtain the id of the post
-            data = request.get_json()
-            post_id = data['id']
-            # Find all the feedbacks by the current user
-            feedbacks = Feedback.query.filter(Feedback._post_id == data['id']).all()
-            # Prepare a JSON list of all the feedbacks, uses for loop shortcut called list comprehension
-            json_ready = [feedback.read() for feedback in feedbacks]
-            # Return a JSON list, converting Python dictionaries to JSON format
-            return jsonify(json_ready)
+            # Obtain the id of the post, the cursor and the page size from the query string
+            try:
+                post_id = request.args.get('post_id', type=int)
+                after = request.args.get('after', type=int)
+                limit = min(int(request.args.get('limit', 50)), 100)  # cap at 100
+            except ValueError:
+                return {'message': 'Invalid feedback parameters'}, 400
+            if post_id is None:
+                return {'message': 'Post ID is required'}, 400
+            if limit < 1:
+                return {'message': 'Invalid limit value'}, 400
+            # Find a page of the post's feedback thread, with author names resolved in one query
+            feedbacks, next_cursor = Feedback.thread(post_id, after, limit)
+            # Return the page along with the cursor to request the next one
+            return jsonify({'feedbacks': feedbacks, 'next_cursor': next_cursor})
 
         @token_required()
         def put(self):
@@ -64,6 +85,8 @@ class FeedbackAPI:
             data = request.get_json()
             # Find the current feedback from the database table(s)
             feedback = Feedback.query.get(data['id'])
+            if feedback is None:
+                return {'message': 'Feedback not found'}, 404
             # Update the feedback
             feedback._content = data['content']
             # Save the feedback
@@ -79,6 +102,8 @@ class FeedbackAPI:
             data = request.get_json()
             # Find the current feedback from the database table(s)
             feedback = Feedback.query.get(data['id'])
+            if feedback is None:
+                return {'message': 'Feedback not found'}, 404
             # Delete the feedback using the ORM method defined in the model
             feedback.delete()
             # Return response
@@ -1,62 +1,65 @@
-import base64
-from flask import Blueprint, request, jsonify, g
+from flask import Blueprint, request, jsonify, g, send_file
 from flask_restful import Api
 from flask_login import current_user, login_required
 from api.jwt_authorize import token_required
-from model.foodchoice import Food
+from api.conditional import is_fresh, not_modified, with_etag
+from model.blob import IMMUTABLE
+from model.foodchoice import Food, food_pairs
+from model.foodimage import resolve_food_image
+from model.revision import Revision
 from __init__ import db
 
 # Define Blueprint and Api
 food_api = Blueprint('food_api', __name__, url_prefix='/api/foodchoice')
 api = Api(food_api)
 
-# Helper function to convert image to Base64
-def encode_image_to_base64(image_path):
-    try:
-        with open(image_path, "rb") as image_file:
-            return base64.b64encode(image_file.read()).decode("utf-8")
-    except FileNotFoundError:
-        return None
-
 @food_api.route('/', methods=['GET'])
 def get_food():
     try:
         pair_number = request.args.get('number', type=int)
 
-        # Query all foods
-        foods = Food.query.all()
-
-        # Group foods by number
-        food_dict = {}
-        for food in foods:
-            food_dict.setdefault(food.number, []).append(food)
+        # Use the number if provided, otherwise the first valid pair; empty if no foods matched (e.g. number too high)
+        return jsonify(food_pairs.pair(pair_number)), 200
+    except Exception as e:
+        return jsonify({'error': 'Failed to fetch foods', 'message': str(e)}), 500
 
-        # Use the number if provided, otherwise pick first valid pair
-        if pair_number:
-            selected_foods = food_dict.get(pair_number, [])[:2]
-        else:
-            selected_foods = next((foods[:2] for foods in food_dict.values() if len(foods) >= 2), [])
+@food_api.route('/pairs', methods=['GET'])
+def get_food_pairs():
+    """
+    Returns a whole round of pairs in one call: every pair in order, or ?count=N pairs picked at random.
+    The ordered list is answered with 304 while the foods have not changed.
+    """
+    try:
+        count = request.args.get('count', type=int)
+        if count is not None:
+            if count < 1:
+                return jsonify({'error': 'count must be a positive number'}), 400
+            return jsonify(food_pairs.round(count)), 200
 
-        # If no foods matched (e.g. number too high), return empty
-        if not selected_foods:
-            return jsonify([]), 200
+        revision = Revision.current('food')
+        etag = f"food-0-{revision}"
+        if is_fresh(etag):
+            return not_modified(etag)
+        return with_etag(jsonify(food_pairs.round(revision=revision)), etag)
+    except Exception as e:
+        return jsonify({'error': 'Failed to fetch food pairs', 'message': str(e)}), 500
 
-        # Convert to JSON
-        food_data = [
-            {
-                'id': food.id,
-                'number': food.number,
-                'food': food.food,
-                'glycemic_load': food.glycemic_load,
-                'info': food.info,
-                'image': f"/images/food/{food.image}" if food.image else None
-            }
-            for food in selected_foods
-        ]
+@food_api.route('/images/<string:name>', methods=['GET'])
+def get_food_image(name):
+    """
+    Serves a food image by its fingerprinted name, as given in the 'image' of each food.
 
-        return jsonify(food_data), 200
-    except Exception as e:
-        return jsonify({'error': 'Failed to fetch foods', 'message': str(e)}), 500
+    The name carries a hash of the content, so the response is cached for a year without revalidation; a WebP
+    copy saved next to the image (see scripts/food_images.py) is sent to clients that accept it.
+    """
+    img_path, current = resolve_food_image(name, request.accept_mimetypes)
+    if img_path is None:
+        return jsonify({'error': 'Image not found'}), 404
+    response = send_file(img_path, conditional=True)
+    # An outdated fingerprint gets the current image, which must not be cached under the old name
+    response.headers['Cache-Control'] = IMMUTABLE if current else 'no-cache'
+    response.vary.add('Accept')
+    return response
 
 @food_api.route('/info/<int:food_id>', methods=['GET'])
 def get_food_info(food_id):
@@ -4,6 +4,8 @@ from flask_restful import Api, Resource
 from __init__ import db
 from api.jwt_authorize import token_required
 from model.foodlog import FoodLog
+from model.meal import meal_index
+from model.mealresponse import MealResponse
 
 # Blueprint for FoodLog API
 foodlog_api = Blueprint('foodlog_api', __name__, url_prefix='/api')
@@ -17,10 +19,17 @@ class FoodLogAPI:
             current_user = g.current_user
             data = request.get_json()
 
-            if not data or 'meal' not in data or 'impact' not in data:
-                return {"message": "Meal and impact are required"}, 400
+            if not data or not isinstance(data.get('meal'), str) or not data['meal'].strip():
+                return {"message": "Meal is required"}, 400
 
-            new_log = FoodLog(user_id=current_user.id, meal=data['meal'], impact=data['impact'])
+            # The impact is derived from the recognized foods, the client's impact is only used when none are
+            analysis = meal_index.analyze(data['meal'])
+            impact = analysis['impact'] or data.get('impact')
+            if not impact:
+                return {"message": "No food was recognized in the meal, an impact is required", "unmatched": analysis['unmatched']}, 400
+
+            glycemic_load = analysis['glycemic_load'] if analysis['items'] else None
+            new_log = FoodLog(user_id=current_user.id, meal=data['meal'], impact=impact, glycemic_load=glycemic_load)
             db.session.add(new_log)
             db.session.commit()
 
@@ -28,10 +37,21 @@ class FoodLogAPI:
 
         @token_required()
         def get(self):
-            """Retrieve all food logs for the user."""
+            """
+            Retrieve a page of the user's food logs, newest first, continuing from ?cursor= with ?limit= logs.
+
+            Returns {"logs": [...], "next_cursor": "..."} rather than a bare list of logs: clients read the list from
+            "logs" and pass "next_cursor" back as ?cursor= until it is null.
+            """
             current_user = g.current_user
-            logs = FoodLog.query.filter_by(user_id=current_user.id).all()
-            return [log.read() for log in logs], 200
+            try:
+                limit = min(int(request.args.get('limit', 50)), 100)  # cap at 100
+                if limit < 1:
+                    raise ValueError
+                logs, next_cursor = FoodLog.page(current_user.id, request.args.get('cursor'), limit)
+            except ValueError:
+                return {"message": "Invalid cursor or limit"}, 400
+            return {"logs": logs, "next_cursor": next_cursor}, 200
 
         @token_required()
         def delete(self):
@@ -51,4 +71,35 @@ class FoodLogAPI:
 
             return {"message": "Log removed"}, 200
 
+    class _ANALYZE(Resource):
+        @token_required()
+        def post(self):
+            """Estimate the glycemic load and impact of a meal without logging it."""
+            data = request.get_json(silent=True)
+            if not data or not isinstance(data.get('meal'), str):
+                return {"message": "Meal is required"}, 400
+            return meal_index.analyze(data['meal']), 200
+
+    class _IMPACT(Resource):
+        @token_required()
+        def get(self):
+            """
+            Report the glucose response to the user's latest meals, ?limit= of them (50 by default, at most 200),
+            with the average post-meal excursion for each impact.
+            """
+            current_user = g.current_user
+            limit = min(max(request.args.get('limit', 50, type=int), 1), 200)
+            return MealResponse.report(current_user.id, limit), 200
+
+    class _SUMMARY(Resource):
+        @token_required()
+        def get(self):
+            """Count the user's meals per day and impact over the last ?days= days (30 by default, at most 366)."""
+            current_user = g.current_user
+            days = min(max(request.args.get('days', 30, type=int), 1), 366)
+            return {"days": FoodLog.daily_summary(current_user.id, days)}, 200
+
     api.add_resource(_CRUD, '/foodlog')
+    api.add_resource(_ANALYZE, '/foodlog/analyze')
+    api.add_resource(_IMPACT, '/foodlog/impact')
+    api.add_resource(_SUMMARY, '/foodlog/summary')
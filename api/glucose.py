@@ -3,7 +3,9 @@ from flask_restful import Api, Resource
 from datetime import datetime
 from __init__ import app
 from api.jwt_authorize import token_required
+from api.conditional import is_fresh, not_modified, with_etag
 from model.glucose import GlucoseRecord
+from model.revision import Revision
 
 # Create a Blueprint for the glucose API
 glucose_api = Blueprint('glucose_api', __name__, url_prefix='/api')
@@ -30,9 +32,13 @@ class GlucoseAPI:
         @token_required()
         def get(self):
             """Get user's glucose records"""
+            # Answer polling clients from the revision counter before touching the records
+            etag = Revision.etag('glucose', g.current_user.id)
+            if is_fresh(etag):
+                return not_modified(etag)
             records = GlucoseRecord.query.filter_by(user_id=g.current_user.id)\
                             .order_by(GlucoseRecord.time.desc()).all()
-            return jsonify([r.read() for r in records])
+            return with_etag(jsonify([r.read() for r in records]), etag)
 
         @token_required()
         def put(self):
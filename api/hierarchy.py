@@ -0,0 +1,33 @@
+from flask import Blueprint, current_app
+from flask_restful import Api, Resource  # used for REST API building
+from api.conditional import is_fresh, not_modified, with_etag
+from model.hierarchy import hierarchy
+from model.revision import Revision
+
+"""
+This Blueprint object is used to define the API for the section, group and channel tree.
+- This Blueprint is registered to the Flask app in main.py.
+"""
+hierarchy_api = Blueprint('hierarchy_api', __name__, url_prefix='/api')
+api = Api(hierarchy_api)
+
+class HierarchyAPI:
+    """
+    Define the read-only endpoint for the navigation tree.
+    """
+    class _TREE(Resource):
+        def get(self):
+            """
+            Retrieve every section with its groups and their channels, answering 304 when the client's copy is current.
+            """
+            revision = Revision.current('hierarchy')
+            etag = f"hierarchy-0-{revision}"
+            if is_fresh(etag):
+                return not_modified(etag)
+            response = current_app.response_class(hierarchy.json(revision), mimetype='application/json')
+            return with_etag(response, etag)
+
+    """
+    Map the _TREE class to the API endpoint for /hierarchy.
+    """
+    api.add_resource(_TREE, '/hierarchy')
@@ -4,6 +4,37 @@ from functools import wraps
 import jwt
 from model.user import User
 
+def request_token():
+    """
+    Returns the JWT token of the request, from the cookie or else from the Authorization header, or None.
+    """
+    # Try to get token from cookies
+    token = request.cookies.get(current_app.config["JWT_TOKEN_NAME"])
+
+    # If token is not found in cookies, try to get it from Authorization header
+    if not token:
+        auth_header = request.headers.get("Authorization")
+        if auth_header:
+            parts = auth_header.split()
+            if len(parts) == 2 and parts[0].lower() == "bearer":
+                token = parts[1]
+    return token
+
+def optional_user():
+    """
+    Returns the user of a valid JWT token on the request, or None for anonymous requests and invalid tokens.
+
+    For endpoints open to everyone that still treat signed-in users differently.
+    """
+    token = request_token()
+    if not token:
+        return None
+    try:
+        data = jwt.decode(token, current_app.config["SECRET_KEY"], algorithms=["HS256"])
+    except jwt.InvalidTokenError:
+        return None
+    return User.query.filter_by(_uid=data.get("_uid")).first()
+
 def token_required(roles=None):
     """
     Guard API endpoints that require authentication.
@@ -32,16 +63,7 @@ def token_required(roles=None):
     def decorator(func_to_guard):
         @wraps(func_to_guard)
         def decorated(*args, **kwargs):
-            # Try to get token from cookies
-            token = request.cookies.get(current_app.config["JWT_TOKEN_NAME"])
-            
-            # If token is not found in cookies, try to get it from Authorization header
-            if not token:
-                auth_header = request.headers.get("Authorization")
-                if auth_header:
-                    parts = auth_header.split()
-                    if len(parts) == 2 and parts[0].lower() == "bearer":
-                        token = parts[1]
+            token = request_token()
 
             if not token:
                 return {
@@ -0,0 +1,53 @@
+from flask import Blueprint, request, jsonify
+from datetime import date
+from api.jwt_authorize import optional_user
+from model.leaderboard import GAMES, leaderboard, parse_window
+
+# Blueprint for the leaderboards of every game stored in LeaderboardEntry
+leaderboard_api = Blueprint('leaderboard_api', __name__, url_prefix='/api')
+
+def get_entries(game):
+    """
+    Returns the best results of a game, all-time or for the day or week given by ?period=&date=.
+
+    Every period returns the same shape: a list of {id, user_id, name, <metric>, date}, e.g. 'time' for matching.
+    """
+    if not GAMES.get(game, {}).get('entries'):
+        return jsonify({'message': 'Game not found'}), 404
+    try:
+        period, day = parse_window(request.args.get('period'), request.args.get('date'))
+        limit = min(int(request.args.get('limit', 20)), leaderboard.capacity)
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    return jsonify(leaderboard.top(game, period, day, limit))
+
+def add_entry(game):
+    """
+    Submits a result; only the best result of a signed-in player is kept.
+
+    Submissions are throttled per caller: the signed-in user, or else the client address, never the submitted name.
+    """
+    if not GAMES.get(game, {}).get('entries'):
+        return jsonify({'message': 'Game not found'}), 404
+    data = request.get_json() or {}
+    metric = GAMES[game]['metric']
+    name = (data.get('name') or 'Anonymous').strip()[:64]
+    try:
+        value = int(data.get(metric, 0))
+        day = date.fromisoformat(data['date']) if data.get('date') else None
+    except (TypeError, ValueError):
+        return jsonify({'message': f'Invalid {metric} or date'}), 400
+    user = optional_user()
+    caller = f'user:{user.id}' if user else f'ip:{request.remote_addr}'
+    if leaderboard.throttle(game, caller):
+        return jsonify({'message': 'Too many submissions, try again shortly'}), 429
+    entry, improved = leaderboard.submit(game, name, value, day, user.id if user else None)
+    return jsonify(dict(entry, improved=improved)), 201
+
+@leaderboard_api.route('/leaderboards/<string:game>', methods=['GET'])
+def get_leaderboard(game):
+    return get_entries(game)
+
+@leaderboard_api.route('/leaderboards/<string:game>', methods=['POST'])
+def add_leaderboard_entry(game):
+    return add_entry(game)
@@ -3,6 +3,7 @@ from flask_restful import Api, Resource
 from api.jwt_authorize import token_required
 from model.nestPost import NestPost
 from model.nestImg import nestImg_base64_decode, nestImg_base64_upload
+from model.thumbnail import SIZES
 
 nestImg_api = Blueprint('nestImg_api', __name__, url_prefix='/api/id')
 api = Api(nestImg_api)
@@ -47,9 +48,13 @@ class _NestImage(Resource):
         current_user = g.current_user
         data = request.get_json()
         current_nestPost = NestPost.query.filter_by(id=data["imageID"]).first()
+        # An optional thumbnail size, one of SIZES, to read instead of the full image
+        size = data.get("size")
+        if size is not None and size not in SIZES:
+            return {'message': f'Size must be one of {", ".join(map(str, SIZES))}.'}, 400
 
         if current_nestPost._image_url:
-            base64_encode = nestImg_base64_decode(current_user.uid, current_nestPost._image_url)
+            base64_encode = nestImg_base64_decode(current_user.uid, current_nestPost._image_url, size)
             if not base64_encode:
                 return {'message': 'An error occurred while reading the picture.'}, 500
             return {'postImg': base64_encode}, 200
@@ -93,7 +98,8 @@ class _NestImage(Resource):
         # Update the user's profile picture to the uploaded file
         try:
             # write the filename reference to the database
-            current_nestPost.update({"nestImg": filename})
+            current_nestPost._image_url = filename
+            current_nestPost.update()
             return {'message': 'Post picture updated successfully'}, 200
         except Exception as e:
             return {'message': f'A database error occurred while assigning post picture: {str(e)}'}, 500
@@ -1,8 +1,9 @@
-from flask import Blueprint, g, request
+from flask import Blueprint, g, request, send_file
 from flask_restful import Api, Resource
 from api.jwt_authorize import token_required
 from model.user import User
-from model.pfp import pfp_base64_decode, pfp_base64_upload, pfp_file_delete
+from model.pfp import pfp_base64_decode, pfp_base64_upload, pfp_etag, pfp_file_delete, pfp_path, pfp_stream_upload
+from model.thumbnail import SIZES, best_variant
 
 pfp_api = Blueprint('pfp_api', __name__, url_prefix='/api/id')
 api = Api(pfp_api)
@@ -92,31 +93,46 @@ class _PFP(Resource):
     @token_required()
     def put(self):
         """
-        Updates the user's profile picture with a new image provided as base64 encoded data.
+        Updates the user's profile picture with a new image.
 
-        This endpoint allows users to update their profile picture by sending a PUT request with base64 encoded image data.
-        The image is decoded and saved to a secure location on the server, and the user's profile information is updated
-        to reference the new image file.
+        The image can be sent in three ways:
+        - As the raw request body, e.g. Content-Type: image/png, which is streamed to disk in chunks.
+        - As a multipart/form-data file field named 'pfp', which is streamed to disk the same way.
+        - As base64 encoded data under the key 'pfp' of a JSON body, kept for older clients.
 
-        The function requires a valid authentication token and expects the base64 image data to be included in the request's JSON body
-        under the key 'pfp'. If the image data is not provided, or if any error occurs during the upload process or while updating
-        the user's profile in the database, an appropriate error message and status code are returned.
+        Images are checked to be PNG, JPEG or GIF from their first bytes and saved in the content-addressed blob store.
+        The user's profile information is then updated to reference the new blob, and the previous picture is left
+        for Blob.collect once no other row references it.
 
         Returns:
         - A JSON object with a message indicating the success or failure of the operation.
         - HTTP status code 200 if the profile picture was updated successfully.
-        - HTTP status code 400 if the base64 image data is missing from the request.
+        - HTTP status code 400 if the image data is missing, not a supported image, or too large.
         - HTTP status code 500 if an error occurs during the upload process or while updating the database.
         """
         current_user = g.current_user
+        previous = current_user.pfp
 
-        # Obtain the base64 image data from the request
-        if 'pfp' not in request.json:
-            return {'message': 'Base64 image data required.'}, 400
-        base64_image = request.json['pfp']
-       
-        # Make an image file from the base64 data 
-        filename = pfp_base64_upload(base64_image, current_user.uid)
+        try:
+            if request.is_json:
+                # Obtain the base64 image data from the request
+                if 'pfp' not in request.json:
+                    return {'message': 'Base64 image data required.'}, 400
+                base64_image = request.json['pfp']
+
+                # Make an image file from the base64 data
+                filename = pfp_base64_upload(base64_image)
+            else:
+                # Stream the uploaded file, or else the request body, to disk
+                if request.mimetype == 'multipart/form-data':
+                    if 'pfp' not in request.files:
+                        return {'message': 'Image file required in the pfp field.'}, 400
+                    stream = request.files['pfp'].stream
+                else:
+                    stream = request.stream
+                filename = pfp_stream_upload(stream)
+        except ValueError as e:
+            return {'message': str(e)}, 400
         if not filename:
             return {'message': 'An error occurred while uploading the profile picture'}, 500
         
@@ -124,8 +140,50 @@ class _PFP(Resource):
         try:
             # write the filename reference to the database
             current_user.update({"pfp": filename})
-            return {'message': 'Profile picture updated successfully'}, 200
         except Exception as e:
             return {'message': f'A database error occurred while assigning profile picture: {str(e)}'}, 500
+        # A picture saved before the blob store is only ever used by this user, remove the old file
+        if previous and previous != filename:
+            pfp_file_delete(current_user.uid, previous)
+        return {'message': 'Profile picture updated successfully'}, 200
         
+class _PFP_IMAGE(Resource):
+    """
+    Serves a user's profile picture as the image file itself, so browsers can cache it.
+
+    The file is sent with send_file, which lets the WSGI server stream it with sendfile instead of copying it through
+    Python. The response carries a strong ETag from the SHA-256 of the content and asks clients to revalidate before
+    reuse, so a repeated load of an unchanged picture is answered with 304 Not Modified and no body.
+
+    Query Parameters:
+    - size (int, optional): 64, 256 or 1024 for a WebP thumbnail no larger than that many pixels a side. The original
+      is sent until the thumbnail has been generated, which happens in the background just after an upload.
+
+    Returns:
+    - The image with its content type, HTTP status code 200.
+    - HTTP status code 304 if the client's If-None-Match matches the current picture.
+    - HTTP status code 400 if the size is not one of the thumbnail sizes.
+    - HTTP status code 404 if the user is not found, the profile picture is not set, or its file is missing.
+    """
+    @token_required()
+    def get(self, uid):
+        size = request.args.get('size', type=int)
+        if 'size' in request.args and size not in SIZES:
+            return {'message': f'Size must be one of {", ".join(map(str, SIZES))}.'}, 400
+
+        user = User.query.filter_by(_uid=uid).first()
+        if not user or not user.pfp:
+            return {'message': 'Profile picture is not set.'}, 404
+
+        img_path = best_variant(pfp_path(user.uid, user.pfp), size)
+        try:
+            etag = pfp_etag(img_path)
+        except OSError:
+            return {'message': 'Profile picture file not found.'}, 404
+
+        response = send_file(img_path, etag=etag, conditional=True, max_age=0)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+
 api.add_resource(_PFP, '/pfp')
+api.add_resource(_PFP_IMAGE, '/pfp/<string:uid>')
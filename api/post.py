@@ -146,33 +146,24 @@ class PostAPI:
             current_user = g.current_user
             # Find all the posts by the current user
             posts = Post.query.filter(Post._user_id == current_user.id).all()
-            # Prepare a JSON list of all the posts, using list comprehension
-            json_ready = [post.read() for post in posts]
+            # Prepare a JSON list of all the posts, resolving user and channel names in one batch
+            json_ready = Post.read_many(posts)
             # Return a JSON list, converting Python dictionaries to JSON format
             return jsonify(json_ready)
 
     class _BULK_CRUD(Resource):
+        @token_required()
         def post(self):
             """
-            Handle bulk post creation by sending POST requests to the single post endpoint.
+            Handle bulk post creation, validating every post and inserting the valid ones in one transaction.
             """
             posts = request.get_json()
 
             if not isinstance(posts, list):
                 return {'message': 'Expected a list of post data'}, 400
 
-            results = {'errors': [], 'success_count': 0, 'error_count': 0}
-
-            with current_app.test_client() as client:
-                for post in posts:
-                    # Simulate a POST request to the single post creation endpoint
-                    response = client.post('/api/post', json=post)
-
-                    if response.status_code == 200:
-                        results['success_count'] += 1
-                    else:
-                        results['errors'].append(response.get_json())
-                        results['error_count'] += 1
+            # Insert the posts for the current user, collecting an error for each rejected item
+            results = Post.bulk_create(posts, g.current_user.id)
 
             # Return the results of the bulk creation process
             return jsonify(results)
@@ -183,11 +174,8 @@ class PostAPI:
             """
             # Find all the posts
             posts = Post.query.all()
-            # Prepare a JSON list of all the posts, using list comprehension
-            json_ready = []
-            for post in posts:
-                post_data = post.read()
-                json_ready.append(post_data)
+            # Prepare a JSON list of all the posts, resolving user and channel names in one batch
+            json_ready = Post.read_many(posts)
             # Return a JSON list, converting Python dictionaries to JSON format
             return jsonify(json_ready)
 
@@ -206,20 +194,46 @@ class PostAPI:
             
             # Find all posts by channel ID and user ID
             posts = Post.query.filter_by(_channel_id=data['channel_id']).all()
-            # Prepare a JSON list of all the posts, using list comprehension
-            json_ready = [post.read() for post in posts]
+            # Prepare a JSON list of all the posts, resolving user and channel names in one batch
+            json_ready = Post.read_many(posts)
             # Return a JSON list, converting Python dictionaries to JSON format
             return jsonify(json_ready)
 
+    class _FEED(Resource):
+        @token_required()
+        def get(self, channel_id):
+            """
+            Retrieve a page of posts in a channel, newest first, optionally filtered by author and stars.
+            """
+            # Parse the cursor, page size and filters from the query string
+            try:
+                before = request.args.get('before', type=int)
+                limit = min(int(request.args.get('limit', 20)), 100)  # cap at 100
+                user_id = request.args.get('user_id', type=int)
+                min_stars = request.args.get('min_stars', type=int)
+            except ValueError:
+                return {'message': 'Invalid feed parameters'}, 400
+            if limit < 1:
+                return {'message': 'Invalid limit value'}, 400
+
+            if Channel.query.get(channel_id) is None:
+                return {'message': 'Channel not found'}, 404
+
+            posts, next_cursor = Post.feed(channel_id, before, limit, user_id, min_stars)
+            # Return the page along with the cursor to request the next one
+            return jsonify({'posts': posts, 'next_cursor': next_cursor})
+
     """
-    Map the _CRUD, _USER, _BULK_CRUD, and _FILTER classes to the API endpoints for /post, /post/user, /posts, and /posts/filter.
+    Map the _CRUD, _USER, _BULK_CRUD, _FILTER and _FEED classes to the API endpoints for /post, /post/user, /posts, /posts/filter and /posts/channel/<channel_id>.
     - The API resource class inherits from flask_restful.Resource.
     - The _CRUD class defines the HTTP methods for the API.
     - The _USER class defines the endpoints for retrieving posts by the current user.
     - The _BULK_CRUD class defines the bulk operations for the API.
     - The _FILTER class defines the endpoints for filtering posts by channel ID and user ID.
+    - The _FEED class defines the paginated channel feed.
     """
     api.add_resource(_CRUD, '/post')
     api.add_resource(_USER, '/post/user')
     api.add_resource(_BULK_CRUD, '/posts')
-    api.add_resource(_FILTER, '/posts/filter')
\ No newline at end of file
+    api.add_resource(_FILTER, '/posts/filter')
+    api.add_resource(_FEED, '/posts/channel/<int:channel_id>')
\ No newline at end of file
@@ -4,7 +4,9 @@ from flask_restful import Api, Resource
 from datetime import datetime
 from __init__ import app
 from api.jwt_authorize import token_required  # Assuming token authentication is required
+from api.conditional import is_fresh, not_modified, with_etag
 from model.prediction import DiabetesPrediction  # Import the DiabetesPrediction model
+from model.revision import Revision
 
 # Create a Blueprint for the prediction API
 prediction_api = Blueprint('prediction_api', __name__, url_prefix='/api')
@@ -105,10 +107,14 @@ class PredictionAPI:
         @token_required()
         def get(self, user_id):
             """Retrieve predictions by user ID."""
+            # Answer polling clients from the revision counter before touching the predictions
+            etag = Revision.etag('predictions', user_id)
+            if is_fresh(etag):
+                return not_modified(etag)
             predictions = DiabetesPrediction.query.filter_by(user_id=user_id).all()  # Filter predictions by user_id
             if not predictions:
                 return {"message": "No predictions found for this user."}, 404
-            return jsonify([prediction.read() for prediction in predictions])
+            return with_etag(jsonify([prediction.read() for prediction in predictions]), etag)
 
 # Map API endpoints
 api.add_resource(PredictionAPI._CRUD, '/prediction')
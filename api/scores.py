@@ -1,9 +1,13 @@
 from flask import Blueprint, request, jsonify, g
 from flask_restful import Api, Resource
 from sqlalchemy import desc
+from sqlalchemy.orm import joinedload
 from __init__ import app
 from api.jwt_authorize import token_required
-from model.scores import Score
+from api.conditional import is_fresh, not_modified, with_etag
+from model.leaderboard import parse_window
+from model.revision import Revision
+from model.scores import Score, top_in_bucket, top_scores
 
 # Create a Blueprint for the score API
 score_api = Blueprint('score_api', __name__, url_prefix='/api')
@@ -92,32 +96,62 @@ class ScoreAPI:
         @token_required()
         def get(self):
             """Retrieve all scores."""
-            scores = Score.query.order_by(desc(Score.points)).all()
+            scores = Score.query.options(joinedload(Score.user)).order_by(desc(Score.points)).all()
             return jsonify([score.read() for score in scores])
 
     class _BY_USER(Resource):
         @token_required()
         def get(self, user_id):
             """Retrieve scores by user ID."""
-            scores = Score.query.filter_by(user_id=user_id).order_by(desc(Score.points)).all()
+            # Answer polling clients from the revision counter before touching the scores
+            etag = Revision.etag('scores', user_id)
+            if is_fresh(etag):
+                return not_modified(etag)
+            scores = Score.query.options(joinedload(Score.user)).filter_by(user_id=user_id).order_by(desc(Score.points)).all()
             if not scores:
                 return {"message": "No scores found for this user."}, 404
-            return jsonify([score.read() for score in scores])
+            return with_etag(jsonify([score.read() for score in scores]), etag)
 
     class _LEADERBOARD(Resource):
         def get(self):
-            """Retrieve top scores (leaderboard)."""
+            """
+            Retrieve top scores (leaderboard), all-time or for the day or week given by ?period=&date=.
+
+            Every period returns the same shape: a list of {id, user_id, username, points, level, created, version}.
+            """
             try:
                 limit = int(request.args.get('limit', 10))
                 limit = min(limit, 100)  # cap at 100
             except ValueError:
                 return {"message": "Invalid limit value"}, 400
+            try:
+                period, day = parse_window(request.args.get('period'), request.args.get('date'))
+            except ValueError as e:
+                return {"message": str(e)}, 400
 
-            scores = Score.query.order_by(desc(Score.points)).limit(limit).all()
-            return jsonify([score.read() for score in scores])
+            if period != 'all':
+                return jsonify(top_in_bucket(period, day, limit))
+            # Served from the in-memory index, rebuilt from the database only when scores changed elsewhere
+            return jsonify(top_scores.top(limit))
+
+    class _RANK(Resource):
+        @token_required()
+        def get(self, user_id):
+            """Retrieve a user's best score, global rank and neighboring scores."""
+            try:
+                neighbors = int(request.args.get('neighbors', 2))
+                neighbors = max(0, min(neighbors, 10))  # cap at 10
+            except ValueError:
+                return {"message": "Invalid neighbors value"}, 400
+
+            rank = Score.rank(user_id, neighbors)
+            if rank is None:
+                return {"message": "No scores found for this user."}, 404
+            return jsonify(rank)
 
 # Register API endpoints
 api.add_resource(ScoreAPI._CRUD, '/score')
 api.add_resource(ScoreAPI._ALL, '/scores')
 api.add_resource(ScoreAPI._BY_USER, '/scores/user/<int:user_id>')
 api.add_resource(ScoreAPI._LEADERBOARD, '/scores/leaderboard')
+api.add_resource(ScoreAPI._RANK, '/scores/rank/<int:user_id>')
@@ -0,0 +1,42 @@
+from flask import Blueprint, request, jsonify
+from flask_restful import Api, Resource  # used for REST API building
+from api.jwt_authorize import token_required
+from model.search import KINDS, search_index
+import model.post, model.nestPost, model.flashcards  # register the indexed models
+
+"""
+This Blueprint object is used to define the full-text search API.
+- This Blueprint is registered to the Flask app in main.py.
+"""
+search_api = Blueprint('search_api', __name__, url_prefix='/api')
+api = Api(search_api)
+
+class SearchAPI:
+    """
+    Define the search endpoint over posts, nest posts and flashcards.
+    """
+    class _SEARCH(Resource):
+        @token_required()
+        def get(self):
+            """
+            Search documents by words, e.g. /api/search?q=insulin+dos*&kind=post&limit=20.
+            A trailing * on a word matches every word starting with it.
+            """
+            query = request.args.get('q', '').strip()
+            if not query:
+                return {'message': 'Search query is required'}, 400
+            kind = request.args.get('kind')
+            if kind and kind not in KINDS:
+                return {'message': f'Kind must be one of {", ".join(KINDS)}'}, 400
+            try:
+                limit = min(int(request.args.get('limit', 20)), 100)  # cap at 100
+            except ValueError:
+                return {'message': 'Invalid limit value'}, 400
+
+            results = search_index.search(query, kind, max(limit, 1))
+            return jsonify({'query': query, 'results': results})
+
+    """
+    Map the _SEARCH class to the API endpoint for /search.
+    """
+    api.add_resource(_SEARCH, '/search')
@@ -3,44 +3,26 @@ from flask import Blueprint, request, jsonify, current_app, g
 from flask_restful import Api, Resource  # used for REST API building
 from __init__ import app, db  # Import db from __init__.py to use it for commit
 from api.jwt_authorize import token_required
-from model.post import Post 
+from model.post import Post
+from model.rating import Rating
 
-# Blueprint for Post API
+# Blueprint for the star rating API
 star_api = Blueprint('star_api', __name__, url_prefix='/api')
 api = Api(star_api)
 
-class PostAPI:
-    class _CRUD(Resource):
-        @token_required()
-        def post(self):
-            """Create a new post."""
-            current_user = g.current_user
-            data = request.get_json()
-
-            if not data or 'title' not in data or 'comment' not in data or 'channel_id' not in data:
-                return {'message': 'Missing required fields'}, 400
-
-            post = Post(data['title'], data['comment'], current_user.id, data['channel_id'], data.get('content', {}))
-            post.create()
-            return jsonify(post.read())
-
-        @token_required()
-        def get(self):
-            """Retrieve a single post by ID."""
-            data = request.get_json()
-            if not data or 'id' not in data:
-                return {'message': 'Post ID not found'}, 400
-
-            post = Post.query.get(data['id'])
-            if not post:
-                return {'message': 'Post not found'}, 404
-
-            return jsonify(post.read())
+def _post_id(data, current_user):
+    """Returns the post id given in the request, defaulting to the user's most recent post."""
+    post_id = data.get('post_id') if data else None
+    if post_id is None:
+        post = Post.query.filter_by(_user_id=current_user.id).order_by(Post.id.desc()).first()
+        return post.id if post else None
+    return post_id
 
+class StarAPI:
     class _RANKING(Resource):
         @token_required()
         def post(self):
-            """Submit a star rating for the most recent post by the user."""
+            """Submit the current user's star rating for a post, by default their most recent post."""
             current_user = g.current_user
             data = request.get_json()
 
@@ -51,31 +33,37 @@ class PostAPI:
             if not isinstance(stars, int) or stars < 1 or stars > 5:
                 return {'message': 'Invalid star ranking. Must be an integer between 1 and 5.'}, 400
 
-            # Find the most recent post by the current user
-            post = Post.query.filter_by(_user_id=current_user.id).order_by(Post.id.desc()).first()
-            if not post:
-                return {'message': 'No posts found for the user'}, 404
-
-            # Update the star rating of the most recent post
-            post._stars = stars
-            db.session.commit()  # Commit the changes to the database
+            post_id = _post_id(data, current_user)
+            if post_id is None or db.session.get(Post, post_id) is None:
+                return {'message': 'Post not found'}, 404
 
-            return {'message': f'Rating of {stars} stars updated for the latest post successfully'}, 201
+            # Record the rating and update the post's running sum and count
+            return Rating.rate(post_id, current_user.id, stars), 201
 
         @token_required()
         def get(self):
-            """Retrieve the star rating of the most recent post by the user."""
+            """Retrieve the average star rating of a post (?post_id=, by default the user's most recent post)."""
+            current_user = g.current_user
+
+            post_id = _post_id({'post_id': request.args.get('post_id', type=int)}, current_user)
+            summary = Rating.summary(post_id, current_user.id) if post_id is not None else None
+            if summary is None:
+                return {'message': 'Post not found'}, 404
+
+            return jsonify(summary)
+
+        @token_required()
+        def delete(self):
+            """Remove the current user's star rating of a post."""
             current_user = g.current_user
+            data = request.get_json(silent=True)
 
-            # Find the most recent post by the current user
-            post = Post.query.filter_by(_user_id=current_user.id).order_by(Post.id.desc()).first()
-            if not post:
-                return {'message': 'No posts found for the user'}, 404
+            if not data or 'post_id' not in data:
+                return {'message': 'Post ID is required'}, 400
+            if not Rating.remove(data['post_id'], current_user.id):
+                return {'message': 'Rating not found'}, 404
 
-            return jsonify({
-                "stars": post._stars
-            })
+            return jsonify(Rating.summary(data['post_id'], current_user.id))
 
     # Map resources to endpoints
-    api.add_resource(_CRUD, '/post')
     api.add_resource(_RANKING, '/ranking')
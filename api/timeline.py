@@ -0,0 +1,36 @@
+from flask import Blueprint, request, jsonify, g
+from flask_restful import Api, Resource  # used for REST API building
+from api.jwt_authorize import token_required
+from model.timeline import timeline
+
+"""
+This Blueprint object is used to define the API for the current user's activity timeline.
+- This Blueprint is registered to the Flask app in main.py.
+"""
+timeline_api = Blueprint('timeline_api', __name__, url_prefix='/api')
+api = Api(timeline_api)
+
+class TimelineAPI:
+    """
+    Define the endpoint merging the current user's activity from every subsystem.
+    """
+    class _TIMELINE(Resource):
+        @token_required()
+        def get(self):
+            """
+            Retrieve a page of the current user's posts, votes, scores, glucose records, food logs, predictions
+            and surveys, newest first. Pass the returned next_cursor as ?cursor= to read the following page.
+            """
+            try:
+                limit = min(int(request.args.get('limit', 20)), 100)  # cap at 100
+                if limit < 1:
+                    raise ValueError
+                events, next_cursor = timeline(g.current_user.id, limit, request.args.get('cursor'))
+            except ValueError:
+                return {'message': 'Invalid limit or cursor'}, 400
+            return jsonify({'events': events, 'next_cursor': next_cursor})
+
+    """
+    Map the _TIMELINE class to the API endpoint for /me/timeline.
+    """
+    api.add_resource(_TIMELINE, '/me/timeline')
@@ -5,6 +5,7 @@ from datetime import datetime
 from __init__ import app
 from api.jwt_authorize import token_required
 from model.user import User
+from model.thumbnail import SIZES
 
 # Create a Blueprint for the user API
 user_api = Blueprint('user_api', __name__, url_prefix='/api')
@@ -23,28 +24,15 @@ class UserAPI:
 
         def post(self):
             """
-            Handle bulk user creation by sending POST requests to the single user endpoint.
+            Handle bulk user creation, validating every user and inserting the valid ones in one transaction.
             """
             users = request.get_json()
 
             if not isinstance(users, list):
                 return {'message': 'Expected a list of user data'}, 400
 
-            results = {'errors': [], 'success_count': 0, 'error_count': 0}
-
-            with current_app.test_client() as client:
-                for user in users:
-                    # Set a default password as we don't have it for bulk creation
-                    user["password"] = app.config['DEFAULT_PASSWORD']
-
-                    # Simulate a POST request to the single user creation endpoint
-                    response = client.post('/api/user', json=user)
-
-                    if response.status_code == 200:
-                        results['success_count'] += 1
-                    else:
-                        results['errors'].append(response.get_json())
-                        results['error_count'] += 1
+            # Users are created with the default password as we don't have it for bulk creation
+            results = User.bulk_create(users)
 
             return jsonify(results)
         
@@ -60,6 +48,7 @@ class UserAPI:
             json_ready = []
             for user in users:
                 user_data = user.read()
+                user_data['avatar'] = user.avatar_url()
                 if current_user.role == 'Admin' or current_user.id == user.id:
                     user_data['access'] = ['rw']  # read-write access control
                 else:
@@ -266,9 +255,36 @@ class UserAPI:
 
             return jsonify(json_ready)
 
+    class _AVATARS(Resource):
+        """
+        Users API operation for the profile picture thumbnails of many users in one request.
+        """
+
+        @token_required()
+        def post(self):
+            """
+            Return the thumbnail of each requested user.
+
+            The body is {"uids": [...], "size": 64, "inline": false}. The response maps each known uid to the URL of
+            its thumbnail, or to a base64 data URI when inline is true and the thumbnail exists, and to null when
+            the user has no profile picture.
+            """
+            body = request.get_json(silent=True) or {}
+            uids = body.get('uids')
+            if not isinstance(uids, list) or not all(isinstance(uid, str) for uid in uids):
+                return {'message': 'Expected a list of uids'}, 400
+            if len(uids) > 500:
+                return {'message': 'At most 500 uids per request'}, 400
+            size = body.get('size', 64)
+            if size not in SIZES:
+                return {'message': f'Size must be one of {", ".join(map(str, SIZES))}.'}, 400
+
+            return jsonify({'avatars': User.avatars(uids, size, bool(body.get('inline')))})
+
 # Register the API resources with the Blueprint
 api.add_resource(UserAPI._ID, '/id')
 api.add_resource(UserAPI._BULK_CRUD, '/users')
 api.add_resource(UserAPI._CRUD, '/user')
 api.add_resource(UserAPI._Security, '/authenticate')
 api.add_resource(UserAPI._GET_ID_NAME, '/users/id-name')
+api.add_resource(UserAPI._AVATARS, '/users/avatars')
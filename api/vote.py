@@ -38,20 +38,13 @@ class VoteAPI:
             if 'vote_type' not in data or data['vote_type'] not in ['upvote', 'downvote']:
                 return {'message': 'Vote type must be "upvote" or "downvote"'}, 400
 
-            # Check if the vote already exists for the user on the post
-            existing_vote = Vote.query.filter_by(_post_id=data['post_id'], _user_id=current_user.id).first()
-            if existing_vote:
-                # Update the existing vote type
-                existing_vote._vote_type = data['vote_type']
-                existing_vote.create()  # This will commit the update
-                return jsonify(existing_vote.read())
-
-            # Create a new vote object
-            vote = Vote(data['vote_type'], current_user.id, data['post_id'])
-            # Save the vote using the ORM method
-            vote.create()
+            if Post.query.get(data['post_id']) is None:
+                return {'message': 'Post not found'}, 404
+
+            # Create the vote, or change the type of the user's existing vote, updating the post counters
+            vote = Vote.cast(data['post_id'], current_user.id, data['vote_type'])
             # Return the saved vote in JSON format
-            return jsonify(vote.read())
+            return jsonify(vote)
 
         @token_required()
         def delete(self):
@@ -80,6 +73,7 @@ class VoteAPI:
         def get(self):
             """
             Retrieve all votes for a specific post, including counts of upvotes and downvotes.
+            Pass counts_only=true to get just the counts.
             """
             # Attempt to get post_id from query parameters first
             post_id = request.args.get('post_id')
@@ -95,24 +89,47 @@ class VoteAPI:
             if not post_id:
                 return {'message': 'Post ID is required'}, 400
 
-            # Get all votes for the post
-            votes = Vote.query.filter_by(_post_id=post_id).all()
-            upvotes = [vote.read() for vote in votes if vote._vote_type == 'upvote']
-            downvotes = [vote.read() for vote in votes if vote._vote_type == 'downvote']
-
+            # The counts are stored on the post, so they never need the votes table
+            post = Post.query.get(post_id)
+            if post is None:
+                return {'message': 'Post not found'}, 404
             result = {
                 "post_id": post_id,
-                "upvote_count": len(upvotes),
-                "downvote_count": len(downvotes),
-                "upvotes": upvotes,
-                "downvotes": downvotes
+                "upvote_count": post._upvotes,
+                "downvote_count": post._downvotes
             }
+            if request.args.get('counts_only', '').lower() in ('1', 'true', 'yes'):
+                return jsonify(result)
+
+            # Get all votes for the post to list the voters
+            votes = Vote.query.filter_by(_post_id=post_id).all()
+            result["upvotes"] = [vote.read() for vote in votes if vote._vote_type == 'upvote']
+            result["downvotes"] = [vote.read() for vote in votes if vote._vote_type == 'downvote']
             return jsonify(result)
 
+    class _BATCH(Resource):
+        @token_required()
+        def post(self):
+            """
+            Retrieve the vote counts and the current user's vote for a list of posts, e.g. a page of a feed.
+            """
+            data = request.get_json(silent=True)
+            post_ids = data.get('post_ids') if isinstance(data, dict) else None
+
+            # Validate the list of post ids, bool is a subclass of int but true is not post 1
+            if not isinstance(post_ids, list) or not all(type(post_id) is int for post_id in post_ids):
+                return {'message': 'A list of post IDs is required'}, 400
+            if len(post_ids) > 200:
+                return {'message': 'At most 200 post IDs per request'}, 400
+
+            return jsonify(Vote.batch_status(post_ids, g.current_user.id))
+
     """
-    Map the _CRUD and _POST_VOTES classes to the API endpoints for /vote and /vote/post.
+    Map the _CRUD, _POST_VOTES and _BATCH classes to the API endpoints for /vote, /vote/post and /votes/batch.
     - The _CRUD class defines the HTTP methods for voting (post and delete).
     - The _POST_VOTES class defines the endpoint for retrieving all votes for a specific post.
+    - The _BATCH class defines the endpoint for retrieving vote counts and the user's votes for many posts at once.
     """
     api.add_resource(_CRUD, '/vote')
     api.add_resource(_POST_VOTES, '/vote/post')
+    api.add_resource(_BATCH, '/votes/batch')
@@ -27,6 +27,8 @@ from api.section import section_api
 from api.nestPost import nestPost_api # Justin added this, custom format for his website
 from api.messages_api import messages_api # Adi added this, messages for his website
 from api.vote import vote_api
+from api.star import star_api
+from api.feedback import feedback_api
 from api.titanic import titanic_api
 from api.diabetes import diabetes_api
 from api.crossword import crossword_api
@@ -36,9 +38,14 @@ from api.foodchoice import food_api
 from api.foodlog import foodlog_api
 from api.flashcards import flashcards_api
 from api.glucose import glucose_api
+from api.leaderboard import leaderboard_api
 from api.matching import matching_api
 from api.trivia import trivia_api
 from api.racing import racing_api
+from api.search import search_api
+from api.hierarchy import hierarchy_api
+from api.timeline import timeline_api
+from api.blob import blob_api
 from api.survey import survey_api  # Assuming you have a survey_api defined
 # database Initialization functions
 from model.user import User, initUsers
@@ -58,7 +65,12 @@ from model.flashcards import Flashcard, initFlashcards
 from model.trivia import Trivia, initQuestions
 from model.answers import Answers, initAnswers
 from model.glucose import GlucoseRecord, init_glucose
+from model.mealresponse import MealResponse, initMealResponses
 from model.survey import Survey, init_surveys
+from model.leaderboard import init_leaderboards
+from model.search import initSearch
+from model.blob import Blob, initBlobs
+from model.schema import upgrade_schema
 # register URIs for api endpoints
 app.register_blueprint(messages_api) # Adi added this, messages for his website
 app.register_blueprint(user_api)
@@ -69,10 +81,13 @@ app.register_blueprint(group_api)
 app.register_blueprint(section_api)
 app.register_blueprint(crossword_api)
 app.register_blueprint(glucose_api)
+app.register_blueprint(leaderboard_api)
 app.register_blueprint(matching_api) 
 app.register_blueprint(nestPost_api)
 app.register_blueprint(nestImg_api)
 app.register_blueprint(vote_api)
+app.register_blueprint(star_api)
+app.register_blueprint(feedback_api)
 app.register_blueprint(titanic_api) 
 app.register_blueprint(diabetes_api)
 app.register_blueprint(prediction_api)
@@ -82,6 +97,10 @@ app.register_blueprint(foodlog_api)
 app.register_blueprint(flashcards_api)
 app.register_blueprint(trivia_api)
 app.register_blueprint(racing_api)
+app.register_blueprint(search_api)
+app.register_blueprint(hierarchy_api)
+app.register_blueprint(timeline_api)
+app.register_blueprint(blob_api)
 app.register_blueprint(survey_api)  # Assuming you have a survey_api defined
 
 # Tell Flask-Login the view function name of your login route
@@ -181,6 +200,7 @@ def generate_data():
     initChannels()
     initPosts()
     initNestPosts()
+    initBlobs()
     initVotes()
     initTitanic()
     initDiabetesModel()
@@ -190,9 +210,12 @@ def generate_data():
     initFoodLogs()
     initFlashcards()
     init_glucose()
+    initMealResponses()
     initQuestions()
     initAnswers()
     init_surveys()
+    init_leaderboards()
+    initSearch()
 
 # Backup the old database
 def backup_database(db_uri, backup_uri):
@@ -212,7 +235,7 @@ def extract_data():
         data['sections'] = [section.read() for section in Section.query.all()]
         data['groups'] = [group.read() for group in Group.query.all()]
         data['channels'] = [channel.read() for channel in Channel.query.all()]
-        data['posts'] = [post.read() for post in Post.query.all()]
+        data['posts'] = Post.read_many(Post.query.all())
         data['food'] = [food.read() for food in Food.query.all()]
         data['foodlog'] = [food.read() for food in FoodLog.query.all()]
         data['glucose'] = [glucose.read() for glucose in GlucoseRecord.query.all()]
@@ -257,8 +280,25 @@ def backup_data():
 def restore_data_command():
     data = load_data_from_json()
     restore_data(data)
+# Define a command to delete stored images nothing references
+@custom_cli.command('collect_blobs')
+def collect_blobs():
+    with app.app_context():
+        print(f"Deleted {Blob.collect()} unreferenced images.")
+# Define a command to add the columns, indexes and foreign keys missing from an existing database
+@custom_cli.command('upgrade_schema')
+def upgrade_schema_command():
+    for statement in upgrade_schema():
+        print(statement)
+# Define a command to recompute the glucose response of every logged meal
+@custom_cli.command('meal_responses')
+def meal_responses():
+    with app.app_context():
+        print(f"Computed the glucose response of {MealResponse.recompute()} meals.")
 # Register the custom command group with the Flask application
 app.cli.add_command(custom_cli)
+# Existing databases get the columns and indexes added to the models since they were created
+upgrade_schema()
 # Define the /chat route using the imported function
 
 # this runs the flask application on the development server
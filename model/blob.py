@@ -0,0 +1,305 @@
+# blob.py
+import hashlib
+import io
+import os
+import re
+import tempfile
+from collections import Counter
+from datetime import datetime, timedelta
+from sqlalchemy import delete, event, inspect, select, update
+from __init__ import app, db
+from model.revision import insert_ignore
+from model.thumbnail import delete_variants, schedule_variants
+
+# Leading bytes of each supported image format -> file extension
+IMAGE_SIGNATURES = {
+    b'\x89PNG\r\n\x1a\n': '.png',
+    b'\xff\xd8\xff': '.jpg',
+    b'GIF87a': '.gif',
+    b'GIF89a': '.gif',
+}
+CHUNK_SIZE = 64 * 1024
+# A blob is named after the SHA-256 of its content and the extension of its format
+BLOB_NAME = re.compile(r'^[0-9a-f]{64}\.(png|jpg|gif)$')
+# Unreferenced blobs younger than this are kept, as an upload is stored before the row referencing it is saved
+GRACE_PERIOD = timedelta(hours=1)
+# Responses for a blob URL never change, so clients and proxies may keep them for a year without revalidating
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+def image_extension(header):
+    """
+    Identifies an image from its first bytes.
+
+    Parameters:
+    - header (bytes): At least the first 8 bytes of the file.
+
+    Returns:
+    - str: The extension of the image format, e.g. '.png', or None if the bytes are not a supported image.
+    """
+    for signature, extension in IMAGE_SIGNATURES.items():
+        if header.startswith(signature):
+            return extension
+    return None
+
+def is_blob(name):
+    """
+    Returns True if a stored image reference names a blob, False for the older per-user filenames.
+    """
+    return bool(name) and BLOB_NAME.match(name) is not None
+
+def blob_path(name):
+    """
+    Returns the path of a blob, sharded by the first two bytes of its hash, e.g. blobs/3f/a2/3fa2...png,
+    so no directory grows past a few hundred entries.
+    """
+    return os.path.join(app.config['UPLOAD_FOLDER'], 'blobs', name[:2], name[2:4], name)
+
+def blob_url(name, size=None):
+    """
+    Returns the immutable URL of a blob, or of one of its thumbnails when a size is given.
+    """
+    return f'/api/blob/{name}?size={size}' if size else f'/api/blob/{name}'
+
+
+class Blob(db.Model):
+    """
+    Blob Model
+
+    The Blob class records an image in the content-addressed store. Files are named after the hash of their
+    content, so identical uploads share one file and a name always refers to the same bytes. The number of rows
+    referencing each blob, from users._pfp, users._car and nestPosts._image_url, is kept in step by mapper events,
+    and blobs nobody references are removed by collect.
+
+    Attributes:
+        _name (db.Column): The primary key, the hex SHA-256 of the content followed by the file extension.
+        _size (db.Column): The size of the file in bytes.
+        _refcount (db.Column): The number of rows referencing the blob.
+        _created (db.Column): The time the blob was last stored, which starts its grace period.
+    """
+    __tablename__ = 'blobs'
+
+    _name = db.Column(db.String(80), primary_key=True)
+    _size = db.Column(db.Integer, nullable=False)
+    _refcount = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    _created = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"Blob(name={self._name}, size={self._size}, refcount={self._refcount})"
+
+    @staticmethod
+    def store(stream, max_size=None):
+        """
+        Saves an image read from a stream in the store, without holding it in memory, and returns its name.
+
+        The stream is copied in chunks to a temporary file while it is hashed, after checking the first bytes are a
+        supported image. If a blob with the same content exists the copy is dropped, otherwise it is renamed into
+        place and its thumbnails are generated in the background. The blob row is committed straight away, with
+        no references until the caller saves the row pointing at it.
+
+        Args:
+            stream: A binary file-like object, e.g. the request body or an uploaded file.
+            max_size (int, optional): The largest accepted image in bytes, MAX_CONTENT_LENGTH by default.
+
+        Returns:
+            str: The name of the blob.
+
+        Raises:
+            ValueError: The data is not a supported image or is larger than max_size.
+            OSError: The file could not be written.
+        """
+        max_size = max_size or app.config['MAX_CONTENT_LENGTH']
+        header = stream.read(CHUNK_SIZE)
+        extension = image_extension(header)
+        if extension is None:
+            raise ValueError('Unsupported image format, expected PNG, JPEG or GIF')
+        staging = os.path.join(app.config['UPLOAD_FOLDER'], 'blobs')
+        os.makedirs(staging, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=staging, suffix='.part')
+        try:
+            digest = hashlib.sha256()
+            size = 0
+            with os.fdopen(fd, 'wb') as temp_file:
+                chunk = header
+                while chunk:
+                    size += len(chunk)
+                    if size > max_size:
+                        raise ValueError(f'Image is larger than {max_size} bytes')
+                    digest.update(chunk)
+                    temp_file.write(chunk)
+                    chunk = stream.read(CHUNK_SIZE)
+            name = digest.hexdigest() + extension
+
+            # Record the blob first, restarting the grace period of an existing one so collect leaves it alone
+            table = Blob.__table__
+            db.session.execute(insert_ignore(db.session, table).values(_name=name, _size=size, _refcount=0, _created=datetime.utcnow()))
+            db.session.execute(update(table).where(table.c['_name'] == name).values(_created=datetime.utcnow()))
+            db.session.commit()
+
+            path = blob_path(name)
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(temp_path, path)
+                temp_path = None
+                schedule_variants(path)
+            return name
+        finally:
+            if temp_path and os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    @staticmethod
+    def store_bytes(data):
+        """
+        Saves an image held in memory in the store and returns its name, see store.
+        """
+        return Blob.store(io.BytesIO(data), max_size=max(len(data), 1))
+
+    @staticmethod
+    def collect(grace=GRACE_PERIOD):
+        """
+        Deletes the blobs no row has referenced for longer than the grace period, with their files and thumbnails.
+
+        Each row is deleted with a conditional DELETE, so a blob referenced again meanwhile is kept, and the file is
+        only removed once that delete is committed and no new upload of the same content has recorded it again.
+
+        Args:
+            grace (timedelta, optional): How long an unreferenced blob is kept after it was stored.
+
+        Returns:
+            int: The number of blobs deleted.
+        """
+        table = Blob.__table__
+        cutoff = datetime.utcnow() - grace
+        unreferenced = db.session.execute(
+            select(table.c['_name']).where(table.c['_refcount'] <= 0, table.c['_created'] < cutoff)
+        ).scalars().all()
+        deleted = 0
+        for name in unreferenced:
+            result = db.session.execute(
+                delete(table).where(table.c['_name'] == name, table.c['_refcount'] <= 0, table.c['_created'] < cutoff)
+            )
+            db.session.commit()
+            stored_again = db.session.execute(select(table.c['_name']).where(table.c['_name'] == name)).first()
+            if result.rowcount != 1 or stored_again:
+                continue
+            path = blob_path(name)
+            if os.path.exists(path):
+                os.remove(path)
+            delete_variants(path)
+            deleted += 1
+        return deleted
+
+    @staticmethod
+    def recount():
+        """
+        Recomputes every reference count from the referencing columns, e.g. after rows were written without the ORM.
+        """
+        counts = Counter()
+        for model, attrs in _references.items():
+            for attr in attrs:
+                column = getattr(model, attr)
+                for name, count in db.session.execute(select(column, db.func.count()).group_by(column)):
+                    if is_blob(name):
+                        counts[name] += count
+        table = Blob.__table__
+        db.session.execute(update(table).values(_refcount=0))
+        for name, count in counts.items():
+            db.session.execute(update(table).where(table.c['_name'] == name).values(_refcount=count))
+        db.session.commit()
+
+    @staticmethod
+    def adopt(path):
+        """
+        Moves an image saved under the older per-user layout into the store.
+
+        Args:
+            path (str): The path of the image file.
+
+        Returns:
+            str: The name of the blob, or None if the file is missing or not a supported image.
+        """
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'rb') as img_file:
+                name = Blob.store(img_file, max_size=os.path.getsize(path) or 1)
+        except ValueError:
+            return None
+        os.remove(path)
+        delete_variants(path)
+        return name
+
+
+def adjust_references(connection, names, delta):
+    """
+    Adds delta to the reference count of each blob in names, inside the caller's transaction.
+
+    Args:
+        connection: The connection (or session) of the triggering write.
+        names (iterable): Stored image references, names that are not blobs are ignored.
+        delta (int): 1 for new references, -1 for removed ones.
+    """
+    table = Blob.__table__
+    for name, count in Counter(name for name in names if is_blob(name)).items():
+        connection.execute(
+            update(table).where(table.c['_name'] == name).values(_refcount=table.c['_refcount'] + delta * count)
+        )
+
+# Referencing model class -> attribute names holding blob names
+_references = {}
+
+def referenced(model, *attrs):
+    """
+    Registers the attributes of a model holding image references, so inserting, changing or deleting its rows
+    keeps the reference counts of the blobs they name up to date.
+
+    Args:
+        model (db.Model): The model class, with an integer id primary key.
+        attrs (str): The names of the attributes holding blob names.
+    """
+    _references[model] = attrs
+
+    def values(target):
+        return [getattr(target, attr) for attr in attrs]
+
+    @event.listens_for(model, 'after_insert')
+    def _inserted(mapper, connection, target):
+        adjust_references(connection, values(target), 1)
+
+    @event.listens_for(model, 'after_delete')
+    def _deleted(mapper, connection, target):
+        adjust_references(connection, values(target), -1)
+
+    @event.listens_for(model, 'before_update')
+    def _updated(mapper, connection, target):
+        state = inspect(target)
+        if not any(state.attrs[attr].history.has_changes() for attr in attrs):
+            return
+        # Read the stored row, as the previous values are not loaded when the row was changed after a commit
+        table = model.__table__
+        old = connection.execute(select(*(table.c[attr] for attr in attrs)).where(table.c['id'] == target.id)).first()
+        adjust_references(connection, old or [], -1)
+        adjust_references(connection, values(target), 1)
+
+
+def initBlobs():
+    """
+    The initBlobs function creates the Blob table, moves existing uploads saved per user into the store,
+    and recounts the references.
+    """
+    from model.user import User
+    from model.nestPost import NestPost
+    with app.app_context():
+        db.create_all()
+        for model, attrs in ((User, ('_pfp', '_car')), (NestPost, ('_image_url',))):
+            for row in model.query.all():
+                owner = row if model is User else db.session.get(User, row._user_id)
+                if owner is None:
+                    continue
+                for attr in attrs:
+                    name = getattr(row, attr)
+                    if name and not is_blob(name):
+                        blob = Blob.adopt(os.path.join(app.config['UPLOAD_FOLDER'], owner.uid, name))
+                        if blob:
+                            setattr(row, attr, blob)
+                            db.session.commit()
+        Blob.recount()
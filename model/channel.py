@@ -2,6 +2,7 @@
 from sqlite3 import IntegrityError
 from sqlalchemy import Text, JSON
 from __init__ import app, db
+from model.revision import track
 from model.group import Group
 
 class Channel(db.Model):
@@ -132,6 +133,8 @@ class Channel(db.Model):
                 channel.create()
         return channels
     
+track(Channel, 'hierarchy')
+
 def initChannels():
     """
     The initChannels function creates the Channel table and adds tester data to the table.
@@ -150,9 +153,11 @@ def initChannels():
         db.create_all()
         """Tester data for table"""
 
+        # Look up the groups by name in one query
+        groups = {group._name: group for group in Group.query.filter(Group._name.in_(['General', 'Support', 'Holiday']))}
         # Home Page Channels
-        general = Group.query.filter_by(_name='General').first()
-        support = Group.query.filter_by(_name='Support').first()
+        general = groups['General']
+        support = groups['Support']
         home_page_channels = [
             Channel(name='Announcements', group_id=general.id),
             Channel(name='Events', group_id=general.id),
@@ -160,7 +165,7 @@ def initChannels():
             Channel(name='Help Desk', group_id=support.id)
         ]        
         # Holiday (OUR PROJECT)
-        holiday = Group.query.filter_by(_name='Holiday').first()
+        holiday = groups['Holiday']
         holiday_channels = [
             Channel(name='Teenage Girls', group_id=holiday.id),
             Channel(name='Teenage Boys', group_id=holiday.id),
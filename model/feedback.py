@@ -1,6 +1,6 @@
 # feedback.py
 from sqlite3 import IntegrityError
-from sqlalchemy import Text
+from sqlalchemy import Text, event, update
 from __init__ import app, db
 from model.user import User
 from model.post import Post
@@ -16,26 +16,30 @@ class Feedback(db.Model):
         _content (db.Column): A Text blob representing the content of the post.
         _user_id (db.Column): An integer representing the user who created the post.
         _post_id (db.Column): An integer representing the post to which the post belongs.
+        _parent_id (db.Column): An integer representing the feedback this one replies to, None for a top level comment.
     """
     __tablename__ = 'feedbacks'
+    __table_args__ = (db.Index('ix_feedbacks_post_id_id', '_post_id', 'id'),)
 
     id = db.Column(db.Integer, primary_key=True)
     _content = db.Column(Text, nullable=False)
     _user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     _post_id = db.Column(db.Integer, db.ForeignKey('posts.id'), nullable=False)
+    _parent_id = db.Column(db.Integer, db.ForeignKey('feedbacks.id'), nullable=True)
 
-    def __init__(self, content, user_id, post_id):
+    def __init__(self, content, user_id, post_id, parent_id=None):
         """
         Constructor, 1st step in object creation.
   
-            title (str): The title of the post.
             content (str): The content of the post.
             user_id (int): The user who created the post.
             post_id (int): The post to which the post belongs.
+            parent_id (int, optional): The feedback this one replies to.
         """
         self._content = content
         self._user_id = user_id
         self._post_id = post_id
+        self._parent_id = parent_id
 
     def __repr__(self):
         """
@@ -69,20 +73,63 @@ class Feedback(db.Model):
         The read method retrieves the object data from the object's attributes and returns it as a dictionary.
         
         Uses:
-            The Post.query and User.query methods to retrieve the post and user objects.
+            The read_many method to resolve the user name.
         
         Returns:
-            dict: A dictionary containing the post data, including user and post names.
+            dict: A dictionary containing the feedback data, including the user name.
         """
-        user = User.query.get(self._user_id)
-        post = Post.query.get(self._post_id)
-        data = {
-            "id": self.id,
-            "content": self._content,
-            "user_name": user.name if user else None,
-            "post_title": post.title if post else None,
-        }
-        return data
+        return Feedback.read_many([self])[0]
+
+    @staticmethod
+    def read_many(feedbacks):
+        """
+        Converts a list of feedbacks to dictionaries, resolving the user names with one IN query for the whole list.
+        
+        Args:
+            feedbacks (list): The Feedback objects to convert.
+        
+        Returns:
+            list: A dictionary per feedback, in the same order.
+        """
+        user_ids = {feedback._user_id for feedback in feedbacks}
+        user_names = dict(db.session.query(User.id, User._name).filter(User.id.in_(user_ids)).all()) if user_ids else {}
+        return [
+            {
+                "id": feedback.id,
+                "content": feedback._content,
+                "user_name": user_names.get(feedback._user_id),
+                "post_id": feedback._post_id,
+                "parent_id": feedback._parent_id
+            }
+            for feedback in feedbacks
+        ]
+
+    @staticmethod
+    def thread(post_id, after=None, limit=50):
+        """
+        Returns one page of a post's feedback thread, oldest first, using the id of the last feedback seen as the cursor.
+        
+        Replies always have a higher id than the feedback they answer, so a client adding pages in order can attach
+        every reply to a parent it already holds.
+        
+        Uses:
+            The (post_id, id) index, so a page costs the same however long the thread is.
+        
+        Args:
+            post_id (int): The post whose feedback is read.
+            after (int, optional): Only return feedback with an id higher than this cursor.
+            limit (int, optional): The maximum number of feedbacks in the page.
+        
+        Returns:
+            tuple: The list of feedback dictionaries and the cursor for the next page, None on the last page.
+        """
+        query = Feedback.query.filter(Feedback._post_id == post_id)
+        if after is not None:
+            query = query.filter(Feedback.id > after)
+        # Read one extra row to find out whether another page follows
+        feedbacks = query.order_by(Feedback.id).limit(limit + 1).all()
+        next_cursor = feedbacks[limit - 1].id if len(feedbacks) > limit else None
+        return Feedback.read_many(feedbacks[:limit]), next_cursor
     
     def update(self):
         """
@@ -111,12 +158,26 @@ class Feedback(db.Model):
             Exception: An error occurred when deleting the object from the database.
         """    
         try:
+            # Keep the replies in the thread by attaching them to this feedback's parent
+            Feedback.query.filter_by(_parent_id=self.id).update({'_parent_id': self._parent_id})
             db.session.delete(self)
             db.session.commit()
         except Exception as e:
             db.session.rollback()
             raise e
 
+def _count(connection, post_id, delta):
+    table = Post.__table__
+    connection.execute(update(table).where(table.c['id'] == post_id).values(_comment_count=table.c['_comment_count'] + delta))
+
+@event.listens_for(Feedback, 'after_insert')
+def _feedback_inserted(mapper, connection, target):
+    _count(connection, target._post_id, 1)
+
+@event.listens_for(Feedback, 'after_delete')
+def _feedback_deleted(mapper, connection, target):
+    _count(connection, target._post_id, -1)
+
 def initFeedbacks():
     """
     The initFeedbacks function creates the Feedback table and adds tester data to the table.
@@ -135,10 +196,10 @@ def initFeedbacks():
         db.create_all()
         """Tester data for table"""
         
-        p1 = Feedback(title='Calculus Help', content='Need help with derivatives.', user_id=1, post_id=1)  
-        p2 = Feedback(title='Game Day', content='Who is coming to the game?', user_id=2, post_id=2)
-        p3 = Feedback(title='New Releases', content='What movies are you excited for?', user_id=3, post_id=3)
-        p4 = Feedback(title='Study Group', content='Meeting at the library.', user_id=1, post_id=1)
+        p1 = Feedback(content='Need help with derivatives.', user_id=1, post_id=1)  
+        p2 = Feedback(content='Who is coming to the game?', user_id=2, post_id=2)
+        p3 = Feedback(content='What movies are you excited for?', user_id=3, post_id=3)
+        p4 = Feedback(content='Meeting at the library.', user_id=1, post_id=1)
         
         for post in [p1, p2, p3, p4]:
             try:
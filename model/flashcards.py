@@ -1,6 +1,7 @@
 import csv
 import os
 from __init__ import db
+from model.search import indexed
 
 class Flashcard(db.Model):
     __tablename__ = 'flashcards'  # Explicitly name the table
@@ -16,6 +17,8 @@ class Flashcard(db.Model):
             "definition": self.definition
         }
 
+indexed(Flashcard, 'flashcard', title='term', body='definition')
+
 def initFlashcards(csv_path='flashcards.csv'):
     print("Flashcards loaded!")
     db.create_all()
@@ -1,8 +1,12 @@
+import random
+import threading
 from flask_restful import Api, Resource
-from sqlalchemy import Text, JSON
+from sqlalchemy import Text, JSON, select
 from __init__ import app, db
 from sqlalchemy import Column, Integer, String, Text
 from sqlite3 import IntegrityError
+from model.revision import Revision, track
+from model.foodimage import food_image_url
 
 class Food(db.Model):
     __tablename__ = 'foods'
@@ -120,6 +124,96 @@ class Food(db.Model):
 
         return restored_foods
 
+track(Food, 'food')
+
+
+class FoodPairs:
+    """
+    In-memory index of the food-choice pairs, mapping each pair number to the serialized dictionaries of its foods.
+
+    The index is read with one query, ordered so each pair keeps the foods in id order, and reused until the
+    'food' revision shows that a food was written by any worker, so serving a pair is a dictionary lookup.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._revision = None
+        self._pairs = {}
+
+    def pairs(self, revision=None):
+        """
+        Returns the index, rebuilding it only when the foods changed.
+
+        Args:
+            revision (int, optional): The current 'food' revision, read from the database when omitted.
+
+        Returns:
+            dict: Pair number -> list of its food dictionaries (two, or one for an incomplete pair), in pair number order.
+        """
+        if revision is None:
+            revision = Revision.current('food')
+        with self._lock:
+            if revision != self._revision:
+                self._pairs = self.build()
+                self._revision = revision
+            return self._pairs
+
+    def pair(self, number=None):
+        """
+        Returns the foods of a pair, or of the first complete pair when no number is given.
+
+        Returns:
+            list: The food dictionaries, a single one when the pair is incomplete, empty when it does not exist.
+        """
+        pairs = self.pairs()
+        if number:
+            return pairs.get(number, [])
+        return next((foods for foods in pairs.values() if len(foods) == 2), [])
+
+    def round(self, count=None, revision=None):
+        """
+        Returns the complete pairs for a round of the game.
+
+        Args:
+            count (int, optional): Pick this many pairs at random, in random order; every pair in order when omitted.
+            revision (int, optional): The current 'food' revision, read from the database when omitted.
+
+        Returns:
+            list: A dictionary per pair with its number and its two foods.
+        """
+        pairs = self.pairs(revision)
+        numbers = [number for number, foods in pairs.items() if len(foods) == 2]
+        if count is not None:
+            numbers = random.sample(numbers, min(count, len(numbers)))
+        return [{'number': number, 'foods': pairs[number]} for number in numbers]
+
+    @staticmethod
+    def build():
+        """
+        Reads every food from the database and groups them in pairs of at most two foods by number.
+        """
+        groups = {}
+        for food in db.session.execute(select(Food).order_by(Food.number, Food.id)).scalars():
+            groups.setdefault(food.number, []).append(food_dict(food))
+        return {number: foods[:2] for number, foods in groups.items() if number is not None}
+
+
+def food_dict(food):
+    """
+    Serializes a food as the food-choice game shows it.
+    """
+    return {
+        'id': food.id,
+        'number': food.number,
+        'food': food.food,
+        'glycemic_load': food.glycemic_load,
+        'info': food.info,
+        'image': food_image_url(food.image)
+    }
+
+
+food_pairs = FoodPairs()
+
 def initFoods(): 
     food_data = [
         {
@@ -0,0 +1,86 @@
+# foodimage.py
+import hashlib
+import os
+import re
+import threading
+from __init__ import app
+
+# A fingerprinted name is the image name with the start of its content hash before the extension, e.g. apple.3fa2c1d4e5b6.png
+FINGERPRINTED_NAME = re.compile(r'^(?P<stem>.+)\.(?P<fingerprint>[0-9a-f]{12})(?P<extension>\.[A-Za-z0-9]+)$')
+# Precompressed variant extension -> the Accept media type a client sends when it can use it
+PRECOMPRESSED = {'.webp': 'image/webp'}
+
+# File path -> ((modification time, size), fingerprint), so an image is only hashed again after it changes
+_fingerprints = {}
+_fingerprints_lock = threading.Lock()
+
+def food_image_path(image):
+    """
+    Returns the path of a food image in FOOD_IMAGE_FOLDER.
+    """
+    return os.path.join(app.config['FOOD_IMAGE_FOLDER'], os.path.basename(image))
+
+def fingerprint(img_path):
+    """
+    Returns the first 12 hex digits of the SHA-256 of an image, recomputed only when its modification time or size changes.
+
+    Raises:
+        OSError: The file cannot be read.
+    """
+    stat = os.stat(img_path)
+    version = (stat.st_mtime_ns, stat.st_size)
+    with _fingerprints_lock:
+        cached = _fingerprints.get(img_path)
+    if cached and cached[0] == version:
+        return cached[1]
+    with open(img_path, 'rb') as img_file:
+        digest = hashlib.sha256(img_file.read()).hexdigest()[:12]
+    with _fingerprints_lock:
+        _fingerprints[img_path] = (version, digest)
+    return digest
+
+def food_image_url(image):
+    """
+    Returns the URL of a food image, named after its content so it can be cached forever.
+
+    Args:
+        image (str): The filename of the image, e.g. 'apple.png'.
+
+    Returns:
+        str: The fingerprinted URL when the image is in FOOD_IMAGE_FOLDER, otherwise the /images/food path the
+        frontend serves; None when the food has no image.
+    """
+    if not image:
+        return None
+    try:
+        stem, extension = os.path.splitext(os.path.basename(image))
+        return f"/api/foodchoice/images/{stem}.{fingerprint(food_image_path(image))}{extension}"
+    except OSError:
+        return f"/images/food/{image}"
+
+def resolve_food_image(name, accept=None):
+    """
+    Finds the file to send for a fingerprinted food image URL.
+
+    A precompressed variant saved next to the image, e.g. apple.png.webp, is preferred when the client accepts it.
+
+    Args:
+        name (str): The last part of the URL, e.g. 'apple.3fa2c1d4e5b6.png'.
+        accept (MIMEAccept, optional): The Accept header of the request.
+
+    Returns:
+        tuple: The path of the file to send and whether the fingerprint is current, or (None, False) when the
+        image does not exist. A stale fingerprint still gets the current image, but it must not be cached forever.
+    """
+    match = FINGERPRINTED_NAME.match(name)
+    if not match:
+        return None, False
+    img_path = food_image_path(match.group('stem') + match.group('extension'))
+    try:
+        current = fingerprint(img_path) == match.group('fingerprint')
+    except OSError:
+        return None, False
+    for extension, mimetype in PRECOMPRESSED.items():
+        if accept is not None and mimetype in accept.values() and os.path.exists(img_path + extension):
+            return img_path + extension, current
+    return img_path, current
@@ -1,20 +1,24 @@
 from flask_sqlalchemy import SQLAlchemy
-from datetime import datetime
+from datetime import datetime, timedelta
+from sqlalchemy import and_, func, or_, select
 from __init__ import db
 
 class FoodLog(db.Model):
     __tablename__ = 'food_logs'
+    __table_args__ = (db.Index('ix_food_logs_user_id_timestamp', 'user_id', 'timestamp'),)
 
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     meal = db.Column(db.String(255), nullable=False)
     impact = db.Column(db.String(50), nullable=False)
+    glycemic_load = db.Column(db.Float, nullable=True)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
 
-    def __init__(self, user_id, meal, impact):
+    def __init__(self, user_id, meal, impact, glycemic_load=None):
         self.user_id = user_id
         self.meal = meal
         self.impact = impact
+        self.glycemic_load = glycemic_load
 
     def create(self):
         db.session.add(self)
@@ -26,9 +30,71 @@ class FoodLog(db.Model):
             "user_id": self.user_id,
             "meal": self.meal,
             "impact": self.impact,
+            "glycemic_load": self.glycemic_load,
             "timestamp": self.timestamp.isoformat()
         }
 
+    @staticmethod
+    def page(user_id, cursor=None, limit=50):
+        """
+        Returns one page of a user's food logs, newest first, continuing after the cursor of the previous page.
+
+        Uses:
+            The (user_id, timestamp) index, so a page costs the same however many meals the user has logged.
+
+        Args:
+            user_id (int): The user whose logs are read.
+            cursor (str, optional): The next_cursor of the previous page, '<timestamp>~<id>'.
+            limit (int, optional): The maximum number of logs in the page.
+
+        Returns:
+            tuple: The list of log dictionaries and the cursor for the next page, None on the last page.
+
+        Raises:
+            ValueError: The cursor is malformed.
+        """
+        query = FoodLog.query.filter(FoodLog.user_id == user_id)
+        if cursor:
+            timestamp, id = cursor.split('~')
+            timestamp, id = datetime.fromisoformat(timestamp), int(id)
+            query = query.filter(or_(FoodLog.timestamp < timestamp, and_(FoodLog.timestamp == timestamp, FoodLog.id < id)))
+        # Read one extra row to find out whether another page follows
+        logs = query.order_by(FoodLog.timestamp.desc(), FoodLog.id.desc()).limit(limit + 1).all()
+        next_cursor = f"{logs[limit - 1].timestamp.isoformat()}~{logs[limit - 1].id}" if len(logs) > limit else None
+        return [log.read() for log in logs[:limit]], next_cursor
+
+    @staticmethod
+    def daily_summary(user_id, days=30):
+        """
+        Counts a user's logged meals per day and impact over the last days.
+
+        Uses:
+            One query grouped by day and impact over a range of the (user_id, timestamp) index.
+
+        Args:
+            user_id (int): The user whose logs are counted.
+            days (int, optional): How many days back from today to include.
+
+        Returns:
+            list: A dictionary per day with logs, newest first, giving its date, total count, count per impact
+            and summed glycemic load.
+        """
+        since = datetime.combine(datetime.utcnow().date() - timedelta(days=days - 1), datetime.min.time())
+        day = func.date(FoodLog.timestamp)
+        rows = db.session.execute(
+            select(day, FoodLog.impact, func.count(FoodLog.id), func.sum(FoodLog.glycemic_load))
+            .where(FoodLog.user_id == user_id, FoodLog.timestamp >= since)
+            .group_by(day, FoodLog.impact)
+            .order_by(day.desc())
+        )
+        summary = {}
+        for date, impact, count, glycemic_load in rows:
+            entry = summary.setdefault(str(date), {'date': str(date), 'total': 0, 'impacts': {}, 'glycemic_load': 0.0})
+            entry['total'] += count
+            entry['impacts'][impact] = count
+            entry['glycemic_load'] = round(entry['glycemic_load'] + (glycemic_load or 0), 1)
+        return list(summary.values())
+
     def update(self):
         db.session.add(self)
         db.session.commit()
@@ -2,9 +2,11 @@ from __init__ import app, db
 import logging
 from datetime import datetime, timedelta
 from sqlalchemy.exc import IntegrityError
+from model.revision import track
 
 class GlucoseRecord(db.Model):
     __tablename__ = 'glucose_records'
+    __table_args__ = (db.Index('ix_glucose_records_user_id_time', 'user_id', 'time'),)
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -90,6 +92,8 @@ class GlucoseRecord(db.Model):
             logging.error(f"Error deleting glucose record: {str(e)}")
             return False
 
+track(GlucoseRecord, 'glucose', owner='user_id')
+
 
 
 def init_glucose():
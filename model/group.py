@@ -1,6 +1,7 @@
 # group.py
 from sqlite3 import IntegrityError
 from __init__ import app, db
+from model.revision import track
 from model.section import Section
 from model.user import User
 
@@ -149,6 +150,9 @@ class Group(db.Model):
         db.session.commit()
         """
         return groups
+
+track(Group, 'hierarchy')
+
 def initGroups():
     with app.app_context():
         """Create database and tables"""
@@ -0,0 +1,78 @@
+# hierarchy.py
+import json
+import threading
+from sqlalchemy import select
+from __init__ import db
+from model.revision import Revision
+from model.section import Section
+from model.group import Group, group_moderators
+from model.channel import Channel
+
+class Hierarchy:
+    """
+    In-memory copy of the section -> group -> channel tree used for navigation.
+
+    The tree is read with one joined query plus one for the moderators, serialized once, and reused until the
+    'hierarchy' revision shows that a section, group or channel was written by any worker.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._revision = None
+        self._json = None
+
+    def json(self, revision=None):
+        """
+        Returns the tree serialized as JSON, rebuilding it only when the hierarchy changed.
+
+        Args:
+            revision (int, optional): The current 'hierarchy' revision, read from the database when omitted.
+
+        Returns:
+            str: A JSON list of sections, each with its groups, each with its channels.
+        """
+        if revision is None:
+            revision = Revision.current('hierarchy')
+        with self._lock:
+            if revision != self._revision:
+                self._json = json.dumps(self.build())
+                self._revision = revision
+            return self._json
+
+    @staticmethod
+    def build():
+        """
+        Reads the whole tree from the database.
+
+        Returns:
+            list: Section dictionaries with nested 'groups', and group dictionaries with nested 'channels'.
+        """
+        rows = db.session.execute(
+            select(Section.id, Section._name, Section._theme, Group.id, Group._name, Channel.id, Channel._name, Channel._attributes)
+            .outerjoin(Group, Group._section_id == Section.id)
+            .outerjoin(Channel, Channel._group_id == Group.id)
+            .order_by(Section.id, Group.id, Channel.id)
+        )
+        moderators = {}
+        for group_id, user_id in db.session.execute(select(group_moderators.c['group_id'], group_moderators.c['user_id'])):
+            moderators.setdefault(group_id, []).append(user_id)
+
+        sections, groups = {}, {}
+        for section_id, section_name, theme, group_id, group_name, channel_id, channel_name, attributes in rows:
+            section = sections.get(section_id)
+            if section is None:
+                section = sections[section_id] = {'id': section_id, 'name': section_name, 'theme': theme, 'groups': []}
+            if group_id is None:
+                continue
+            group = groups.get(group_id)
+            if group is None:
+                group = groups[group_id] = {
+                    'id': group_id, 'name': group_name, 'moderators': moderators.get(group_id, []), 'channels': []
+                }
+                section['groups'].append(group)
+            if channel_id is not None:
+                group['channels'].append({'id': channel_id, 'name': channel_name, 'attributes': attributes})
+        return list(sections.values())
+
+
+hierarchy = Hierarchy()
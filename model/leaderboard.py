@@ -0,0 +1,388 @@
+# leaderboard.py
+import threading
+import time
+from datetime import date, datetime
+from zoneinfo import ZoneInfo
+from sqlalchemy import event, select, text, update
+from __init__ import app, db
+from model.revision import Revision, insert_ignore
+from model.user import User
+
+# Game name -> how its results are ranked and presented. Games marked 'entries' keep one best result per signed-in
+# player in LeaderboardEntry; adding such a game only needs a line here.
+GAMES = {
+    'scores': {'metric': 'points', 'name': 'username', 'order': 'desc'},
+    'matching': {'metric': 'time', 'name': 'name', 'order': 'asc', 'entries': True, 'timezone': 'UTC'},
+    'racing': {'metric': 'score', 'name': 'name', 'order': 'asc', 'entries': True, 'timezone': 'America/Los_Angeles'},
+}
+
+PERIODS = ('day', 'week', 'all')
+
+class LeaderboardBucket(db.Model):
+    """
+    LeaderboardBucket Model
+
+    The LeaderboardBucket class holds a copy of a game result in the daily and weekly bucket it was achieved in,
+    so a time-windowed leaderboard is a single indexed read of one bucket instead of a scan over the history.
+    Buckets are written in the same flush as the result they copy.
+
+    Attributes:
+        id (db.Column): The primary key, an integer representing the unique identifier for the row.
+        _game (db.Column): The game the result belongs to, a key of GAMES.
+        _period (db.Column): The bucket length, 'day' or 'week'.
+        _bucket (db.Column): The bucket key, e.g. '2025-06-01' for a day or '2025-W22' for an ISO week.
+        _entry_id (db.Column): The id of the result in the game's own table.
+        _user_id (db.Column): The user who achieved the result, if known.
+        _name (db.Column): The display name submitted with the result, if any.
+        _value (db.Column): The ranked metric (points, time or score).
+        _date (db.Column): The day the result was achieved.
+    """
+    __tablename__ = 'leaderboard_buckets'
+    __table_args__ = (
+        db.UniqueConstraint('_game', '_period', '_bucket', '_entry_id', name='uq_leaderboard_buckets_entry'),
+        db.Index('ix_leaderboard_buckets_value', '_game', '_period', '_bucket', '_value'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    _game = db.Column(db.String(32), nullable=False)
+    _period = db.Column(db.String(8), nullable=False)
+    _bucket = db.Column(db.String(16), nullable=False)
+    _entry_id = db.Column(db.Integer, nullable=False)
+    _user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
+    _name = db.Column(db.String(255), nullable=True)
+    _value = db.Column(db.Integer, nullable=False)
+    _date = db.Column(db.String(16), nullable=False)
+
+    def __repr__(self):
+        return f"LeaderboardBucket(game={self._game}, bucket={self._bucket}, entry_id={self._entry_id}, value={self._value})"
+
+    def read(self, user_name=None):
+        """
+        Returns the result in the same shape as the game's own leaderboard.
+
+        Args:
+            user_name (str, optional): The name of the user who achieved the result.
+        """
+        game = GAMES[self._game]
+        return {
+            'id': self._entry_id,
+            'user_id': self._user_id,
+            game['name']: self._name or user_name,
+            game['metric']: self._value,
+            'date': self._date
+        }
+
+    @staticmethod
+    def top(game, period, day=None, limit=20):
+        """
+        Reads the best results of one bucket, using the (game, period, bucket, value) index.
+
+        Args:
+            game (str): The game, a key of GAMES.
+            period (str): 'day' or 'week'.
+            day (date, optional): A day inside the wanted bucket, today (UTC) by default.
+            limit (int, optional): The number of results wanted.
+
+        Returns:
+            list: Result dictionaries, best first.
+        """
+        rows = LeaderboardBucket._ranked(db.session.query(LeaderboardBucket, User._name), game, period, day)\
+            .outerjoin(User, User.id == LeaderboardBucket._user_id).limit(limit).all()
+        return [row.read(user_name) for row, user_name in rows]
+
+    @staticmethod
+    def top_entry_ids(game, period, day=None, limit=20):
+        """
+        Returns the ids of the best results of one bucket in the game's own table, best first, for games whose
+        leaderboard rows are read from that table.
+        """
+        query = LeaderboardBucket._ranked(db.session.query(LeaderboardBucket._entry_id), game, period, day)
+        return [entry_id for (entry_id,) in query.limit(limit)]
+
+    @staticmethod
+    def _ranked(query, game, period, day):
+        bucket = bucket_keys(day or datetime.utcnow().date())[period]
+        value = LeaderboardBucket._value
+        order = value.desc() if GAMES[game]['order'] == 'desc' else value.asc()
+        return query.filter(LeaderboardBucket._game == game, LeaderboardBucket._period == period, LeaderboardBucket._bucket == bucket)\
+            .order_by(order, LeaderboardBucket.id.asc())
+
+
+def bucket_keys(day):
+    """
+    Returns the day and ISO week bucket keys a day falls in.
+    """
+    year, week, _ = day.isocalendar()
+    return {'day': day.isoformat(), 'week': f'{year}-W{week:02d}'}
+
+def parse_window(period, day):
+    """
+    Validates the period and day query parameters of a leaderboard request.
+
+    Args:
+        period (str): 'day', 'week' or 'all'; None means 'all'.
+        day (str): An ISO date inside the wanted bucket; None means today.
+
+    Returns:
+        tuple: The period and the day as a date (or None).
+
+    Raises:
+        ValueError: The period or the day is not valid.
+    """
+    period = period or 'all'
+    if period not in PERIODS:
+        raise ValueError(f"Period must be one of {', '.join(PERIODS)}")
+    return period, date.fromisoformat(day) if day else None
+
+def result_day(value):
+    """
+    Converts the date stored with a game result (a datetime, a date or an ISO string) to a date.
+    """
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        return date.fromisoformat(str(value)[:10])
+    except ValueError:
+        return datetime.utcnow().date()
+
+
+# Game -> (model, fields, keep_best) of the result models registered with bucketed, for the backfill
+_bucketed = {}
+
+def bucketed(model, game, fields, keep_best=False):
+    """
+    Registers a result model so every insert, update and delete of its rows is copied into the buckets.
+    An update first removes the row from its buckets, since a changed date moves it to another day and week.
+
+    Args:
+        model (db.Model): The model class holding the game's results.
+        game (str): The game, a key of GAMES.
+        fields (callable): Maps a row to a dict with user_id, name, value and day.
+        keep_best (bool, optional): Only overwrite a bucket row when the new value ranks better.
+    """
+    _bucketed[game] = (model, fields, keep_best)
+    event.listen(model, 'after_insert', lambda mapper, connection, target: _write(connection, game, target.id, fields(target), keep_best))
+    event.listen(model, 'after_update', lambda mapper, connection, target: _rewrite(connection, game, target.id, fields(target), keep_best))
+    event.listen(model, 'after_delete', lambda mapper, connection, target: _remove(connection, game, target.id))
+
+def _write(connection, game, entry_id, fields, keep_best):
+    table = LeaderboardBucket.__table__
+    value = table.c['_value']
+    day = result_day(fields['day'])
+    for period, bucket in bucket_keys(day).items():
+        connection.execute(insert_ignore(connection, table).values(
+            _game=game, _period=period, _bucket=bucket, _entry_id=entry_id, _user_id=fields.get('user_id'),
+            _name=fields.get('name'), _value=fields['value'], _date=day.isoformat()
+        ))
+        stmt = update(table).where(
+            table.c['_game'] == game, table.c['_period'] == period,
+            table.c['_bucket'] == bucket, table.c['_entry_id'] == entry_id
+        )
+        if keep_best:
+            stmt = stmt.where(value < fields['value'] if GAMES[game]['order'] == 'desc' else value > fields['value'])
+        connection.execute(stmt.values(_user_id=fields.get('user_id'), _name=fields.get('name'), _value=fields['value']))
+
+def _rewrite(connection, game, entry_id, fields, keep_best):
+    _remove(connection, game, entry_id)
+    _write(connection, game, entry_id, fields, keep_best)
+
+def _remove(connection, game, entry_id):
+    table = LeaderboardBucket.__table__
+    connection.execute(table.delete().where(table.c['_game'] == game, table.c['_entry_id'] == entry_id))
+
+
+class LeaderboardEntry(db.Model):
+    """
+    LeaderboardEntry Model
+
+    The LeaderboardEntry class holds the results of the games marked 'entries' in GAMES, replacing one table per
+    game. A signed-in player has one entry per game holding their best result; submitting a worse result leaves it
+    unchanged. Results without a signed-in player have no identity to merge on, so each one is its own entry.
+
+    Attributes:
+        id (db.Column): The primary key, an integer representing the unique identifier for the entry.
+        _game (db.Column): The game the result belongs to, a key of GAMES.
+        _user_id (db.Column): The signed-in player, unique within a game; None for anonymous results.
+        _name (db.Column): The player's display name.
+        _value (db.Column): The player's best value of the game's metric.
+        _date (db.Column): The day the best result was achieved, e.g. '2024-06-01'.
+    """
+    __tablename__ = 'leaderboard_entries'
+    __table_args__ = (
+        db.UniqueConstraint('_game', '_user_id', name='uq_leaderboard_entries_player'),
+        db.Index('ix_leaderboard_entries_value', '_game', '_value'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    _game = db.Column(db.String(32), nullable=False)
+    _user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
+    _name = db.Column(db.String(64), nullable=False)
+    _value = db.Column(db.Integer, nullable=False)
+    _date = db.Column(db.String(16), nullable=False)
+
+    def __repr__(self):
+        return f"LeaderboardEntry(id={self.id}, game={self._game}, name={self._name}, value={self._value})"
+
+    def read(self):
+        """
+        Returns the entry in the shape of the game's leaderboard, e.g. {'id', 'user_id', 'name', 'time', 'date'}
+        for matching, the same shape as the game's day and week buckets.
+        """
+        return {
+            'id': self.id,
+            'user_id': self._user_id,
+            'name': self._name,
+            GAMES[self._game]['metric']: self._value,
+            'date': self._date
+        }
+
+
+class Leaderboard:
+    """
+    Service for the games whose results live in LeaderboardEntry.
+
+    The best results of each game are cached in memory and checked against the game's revision, so reads do
+    not query the entries table until someone submits a result. Submissions are limited to one per caller and
+    game every LEADERBOARD_SUBMIT_INTERVAL seconds, where the caller is the signed-in user or else the client
+    address. The limit is kept in the memory of each process, so with several workers a caller can submit once
+    per worker in the interval.
+    """
+    def __init__(self, capacity=100):
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._cache = {}  # game -> (revision, serialized entries)
+        self._last_submit = {}  # (game, caller) -> monotonic time of the last accepted submission
+
+    def top(self, game, period='all', day=None, limit=20):
+        """
+        Returns the best results of a game, all-time or for one day or week bucket.
+
+        Args:
+            game (str): The game, a key of GAMES.
+            period (str, optional): 'day', 'week' or 'all'.
+            day (date, optional): A day inside the wanted bucket, today in the game's timezone by default.
+            limit (int, optional): The number of results wanted, at most the cache capacity.
+
+        Returns:
+            list: Result dictionaries, best first.
+        """
+        if period != 'all':
+            return LeaderboardBucket.top(game, period, day or self.today(game), limit)
+        revision = Revision.current(f'leaderboard:{game}')
+        with self._lock:
+            cached = self._cache.get(game)
+            if cached is None or cached[0] != revision:
+                value = LeaderboardEntry._value
+                order = value.desc() if GAMES[game]['order'] == 'desc' else value.asc()
+                entries = LeaderboardEntry.query.filter(LeaderboardEntry._game == game)\
+                    .order_by(order, LeaderboardEntry.id.asc()).limit(self.capacity).all()
+                cached = (revision, [entry.read() for entry in entries])
+                self._cache[game] = cached
+        return cached[1][:max(limit, 0)]
+
+    def throttle(self, game, caller):
+        """
+        Records a submission attempt and checks whether the caller submitted to the game too recently.
+
+        The check and the record happen under one lock, so concurrent requests of a caller in this process cannot
+        both pass.
+
+        Args:
+            game (str): The game, a key of GAMES.
+            caller (str): Who is submitting, e.g. 'user:12' or 'ip:10.0.0.1'.
+
+        Returns:
+            bool: True if the submission must be refused.
+        """
+        interval = app.config['LEADERBOARD_SUBMIT_INTERVAL']
+        now = time.monotonic()
+        with self._lock:
+            last = self._last_submit.get((game, caller))
+            if last is not None and now - last < interval:
+                return True
+            self._last_submit[(game, caller)] = now
+            if len(self._last_submit) > 10000:
+                self._prune()
+        return False
+
+    def submit(self, game, name, value, day=None, user_id=None):
+        """
+        Records a result. A signed-in player's entry and day and week buckets keep only their best result.
+
+        Args:
+            game (str): The game, a key of GAMES.
+            name (str): The player's display name.
+            value (int): The value of the game's metric.
+            day (date, optional): The day of the result, today in the game's timezone by default.
+            user_id (int, optional): The signed-in player; without one the result is stored as a new entry.
+
+        Returns:
+            tuple: The player's (possibly unchanged) best entry as a dictionary, and True if this result improved it.
+        """
+        day = day or self.today(game)
+        table = LeaderboardEntry.__table__
+        stored = table.c['_value']
+        better = stored < value if GAMES[game]['order'] == 'desc' else stored > value
+        values = {'_game': game, '_user_id': user_id, '_name': name, '_value': value, '_date': day.isoformat()}
+        try:
+            if user_id is None:
+                entry_id = db.session.execute(table.insert().values(**values)).inserted_primary_key[0]
+                improved = True
+            else:
+                player = (table.c['_game'] == game) & (table.c['_user_id'] == user_id)
+                inserted = db.session.execute(insert_ignore(db.session, table).values(**values)).rowcount
+                improved = inserted or db.session.execute(
+                    update(table).where(player, better).values(_name=name, _value=value, _date=day.isoformat())
+                ).rowcount
+                entry_id = db.session.execute(select(table.c['id']).where(player)).scalar()
+            _write(db.session, game, entry_id, {'user_id': user_id, 'name': name, 'value': value, 'day': day}, keep_best=True)
+            if improved:
+                Revision.bump(db.session, f'leaderboard:{game}')
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        return db.session.get(LeaderboardEntry, entry_id).read(), bool(improved)
+
+    def today(self, game):
+        """
+        Returns the current date in the game's timezone.
+        """
+        return datetime.now(ZoneInfo(GAMES[game].get('timezone', 'UTC'))).date()
+
+    def _prune(self):
+        cutoff = time.monotonic() - app.config['LEADERBOARD_SUBMIT_INTERVAL']
+        self._last_submit = {key: last for key, last in self._last_submit.items() if last >= cutoff}
+
+leaderboard = Leaderboard()
+
+
+def init_leaderboards():
+    """
+    Creates the leaderboard tables, imports results from the old per-game tables if they exist, and copies the
+    existing results of the bucketed models, e.g. scores, into their day and week buckets.
+
+    The old results have no signed-in player, so each one becomes its own entry; a game that already has entries
+    is not imported again.
+    """
+    with app.app_context():
+        db.create_all()
+        legacy = {'matching': ('matching_leaderboard', 'time'), 'racing': ('racing_leaderboard', 'score')}
+        tables = db.inspect(db.engine).get_table_names()
+        for game, (table, metric) in legacy.items():
+            if table not in tables or LeaderboardEntry.query.filter_by(_game=game).first():
+                continue
+            rows = db.session.execute(text(f'SELECT name, {metric}, date FROM {table}')).all()
+            for name, value, day in rows:
+                leaderboard.submit(game, name, value, result_day(day))
+            print(f"Imported {len(rows)} {game} results from {table}")
+        for game, (model, fields, keep_best) in _bucketed.items():
+            if LeaderboardBucket.query.filter_by(_game=game).first():
+                continue
+            rows = model.query.all()
+            for row in rows:
+                _write(db.session, game, row.id, fields(row), keep_best)
+            db.session.commit()
+            print(f"Copied {len(rows)} {game} results into their buckets")
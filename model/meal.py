@@ -0,0 +1,194 @@
+# meal.py
+import re
+import threading
+from difflib import get_close_matches
+import numpy as np
+from sqlalchemy import select
+from __init__ import db
+from model.foodchoice import Food
+from model.revision import Revision
+
+# Typical glycemic load of one serving of common foods, used when the foods table has no entry for them
+REFERENCE_GLYCEMIC_LOADS = {
+    'apple': 6, 'banana': 11, 'orange': 5, 'grape': 11, 'pear': 4, 'peach': 5, 'mango': 8, 'pineapple': 6,
+    'watermelon': 4, 'strawberry': 1, 'blueberry': 6, 'cherry': 3, 'raisin': 28, 'date': 18, 'orange juice': 12,
+    'apple juice': 12, 'juice': 12, 'white bread': 10, 'whole wheat bread': 9, 'bread': 10, 'toast': 10,
+    'bagel': 25, 'croissant': 17, 'muffin': 17, 'pancake': 39, 'waffle': 54, 'tortilla': 12, 'cracker': 12,
+    'cereal': 21, 'cornflake': 21, 'granola': 13, 'oatmeal': 9, 'porridge': 13, 'rice': 43, 'white rice': 43,
+    'brown rice': 16, 'fried rice': 40, 'pasta': 23, 'spaghetti': 13, 'noodle': 26, 'couscous': 20, 'quinoa': 13,
+    'potato': 17, 'sweet potato': 22, 'french fry': 21, 'fry': 21, 'potato chip': 11, 'chip': 11, 'corn': 9,
+    'pea': 3, 'carrot': 2, 'bean': 7, 'lentil': 5, 'chickpea': 8, 'hummus': 1, 'broccoli': 0, 'spinach': 0,
+    'salad': 0, 'lettuce': 0, 'tomato': 1, 'cucumber': 0, 'egg': 0, 'chicken': 0, 'beef': 0, 'steak': 0,
+    'pork': 0, 'bacon': 0, 'fish': 0, 'tuna': 0, 'salmon': 0, 'tofu': 1, 'cheese': 0, 'milk': 2, 'yogurt': 3,
+    'ice cream': 8, 'butter': 0, 'peanut butter': 1, 'nut': 1, 'almond': 0, 'honey': 10, 'sugar': 7, 'jam': 10,
+    'soda': 16, 'cola': 16, 'coke': 16, 'coffee': 0, 'tea': 0, 'water': 0, 'cookie': 7, 'cake': 19, 'donut': 17,
+    'chocolate': 14, 'candy': 20, 'popcorn': 8, 'pretzel': 16, 'pizza': 22, 'hamburger': 17, 'burger': 17,
+    'sandwich': 15, 'burrito': 22, 'taco': 8, 'sushi': 20, 'mac and cheese': 32,
+}
+# Glycemic load of a meal below which its impact is Low, and below which it is Medium
+IMPACT_THRESHOLDS = ((10, 'Low'), (20, 'Medium'))
+# Words that set how many servings the next food counts for
+QUANTITIES = {'one': 1, 'two': 2, 'three': 3, 'four': 4, 'five': 5, 'half': 0.5, 'double': 2}
+# Articles count as one serving unless a quantity came before them, as in 'half a pizza'
+ARTICLES = {'a', 'an'}
+# Words between foods that are not ingredients and are not reported as unrecognized
+FILLER_WORDS = {
+    'and', 'with', 'of', 'some', 'the', 'on', 'in', 'for', 'plus', 'side', 'bowl', 'cup', 'glass', 'slice',
+    'piece', 'plate', 'serving', 'small', 'large', 'big', 'little', 'handful', 'few', 'or', 'to', 'my', 'had',
+    'i', 'me', 'we', 'you', 'he', 'she', 'they', 'it', 'our', 'ate', 'eat', 'eaten', 'eating', 'have', 'having',
+    'drank', 'drink', 'drunk', 'drinking', 'got', 'just', 'then', 'also', 'breakfast', 'lunch', 'dinner',
+    'snack', 'meal', 'today', 'morning', 'afternoon', 'evening', 'night',
+}
+# Minimum similarity of a misspelled word to a known food name for the fuzzy match
+FUZZY_CUTOFF = 0.8
+# Only words longer than this are fuzzy matched, short words are too close to unrelated foods ('ate' to 'date')
+FUZZY_MIN_LENGTH = 4
+
+WORD = re.compile(r"[a-z]+|\d+(?:\.\d+)?")
+
+def stem(word):
+    """
+    Reduces a word to its singular form, so 'potatoes', 'berries', 'peaches' and 'eggs' match 'potato', 'berry',
+    'peach' and 'egg'.
+    """
+    if word.endswith('ies') and len(word) > 4:
+        return word[:-3] + 'y'
+    if word.endswith(('oes', 'sses', 'ches', 'shes', 'xes')) and len(word) > 4:
+        return word[:-2]
+    if word.endswith('s') and not word.endswith('ss') and len(word) > 3:
+        return word[:-1]
+    return word
+
+def tokenize(text):
+    """
+    Splits meal text into lower case, singular words and numbers.
+    """
+    return [stem(token) for token in WORD.findall(text.lower())]
+
+def impact_for(glycemic_load):
+    """
+    Classifies the glycemic load of a meal as 'Low', 'Medium' or 'High'.
+    """
+    for limit, impact in IMPACT_THRESHOLDS:
+        if glycemic_load < limit:
+            return impact
+    return 'High'
+
+
+class MealIndex:
+    """
+    In-memory index of food names to glycemic loads, for analysing free-text meals.
+
+    Names are kept in a word-level trie, so a meal is matched in one pass taking the longest name at each word,
+    e.g. 'white rice' before 'rice'. Longer words matching no name fall back to the closest single-word
+    name by similarity, to absorb typos. Loads sit in a numpy array indexed by food, so a meal's total is one dot product.
+    The foods table takes precedence over the reference loads, and the index is rebuilt when the 'food' revision
+    shows that a food was written by any worker.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._revision = None
+        self._trie = {}
+        self._names = []
+        self._loads = np.zeros(0)
+        self._words = {}
+
+    def _current(self, revision=None):
+        if revision is None:
+            revision = Revision.current('food')
+        with self._lock:
+            if revision != self._revision:
+                self._build()
+                self._revision = revision
+            return self._trie, self._names, self._loads, self._words
+
+    def _build(self):
+        loads = {tuple(tokenize(name)): load for name, load in REFERENCE_GLYCEMIC_LOADS.items()}
+        for name, load in db.session.execute(select(Food.food, Food.glycemic_load)):
+            words = tuple(tokenize(name))
+            if words and load is not None:
+                loads[words] = load
+        trie, names = {}, []
+        for words, load in loads.items():
+            node = trie
+            for word in words:
+                node = node.setdefault(word, {})
+            node[None] = len(names)
+            names.append(' '.join(words))
+        self._trie, self._names = trie, names
+        self._loads = np.array([loads[tuple(name.split(' '))] for name in names], dtype=float)
+        # Single-word names for the fuzzy fallback
+        self._words = {name: index for index, name in enumerate(names) if ' ' not in name}
+
+    def analyze(self, meal, revision=None):
+        """
+        Finds the foods in a meal description and derives its glycemic load and impact.
+
+        Args:
+            meal (str): Free text such as '2 slices of white bread and a banana'.
+            revision (int, optional): The current 'food' revision, read from the database when omitted.
+
+        Returns:
+            dict: The total glycemic_load, the impact ('Low', 'Medium', 'High', or None when no food was
+            recognized), the matched items with their quantity and load, and the unrecognized words.
+        """
+        trie, names, loads, words = self._current(revision)
+        tokens = tokenize(meal)
+        indexes, quantities, items, unmatched = [], [], [], []
+        quantity = None
+        position = 0
+        while position < len(tokens):
+            token = tokens[position]
+            if token[0].isdigit():
+                quantity = float(token)
+                position += 1
+                continue
+            if token in QUANTITIES:
+                quantity = QUANTITIES[token]
+                position += 1
+                continue
+            if token in ARTICLES:
+                position += 1
+                continue
+            # Walk the trie for the longest food name starting at this word
+            node, match, length = trie, None, 0
+            for offset in range(position, len(tokens)):
+                node = node.get(tokens[offset])
+                if node is None:
+                    break
+                if None in node:
+                    match, length = node[None], offset - position + 1
+            fuzzy = False
+            if match is None and token not in FILLER_WORDS and len(token) > FUZZY_MIN_LENGTH:
+                close = get_close_matches(token, words, n=1, cutoff=FUZZY_CUTOFF)
+                if close:
+                    match, length, fuzzy = words[close[0]], 1, True
+            if match is None:
+                if token not in FILLER_WORDS:
+                    unmatched.append(token)
+                position += 1
+                continue
+            servings = quantity if quantity is not None else 1
+            indexes.append(match)
+            quantities.append(servings)
+            items.append({
+                'food': names[match],
+                'text': ' '.join(tokens[position:position + length]),
+                'quantity': servings,
+                'glycemic_load': float(loads[match]),
+                'fuzzy': fuzzy
+            })
+            quantity = None
+            position += length
+
+        total = float(np.dot(loads[np.array(indexes, dtype=int)], np.array(quantities, dtype=float))) if indexes else 0.0
+        return {
+            'glycemic_load': round(total, 1),
+            'impact': impact_for(total) if items else None,
+            'items': items,
+            'unmatched': unmatched
+        }
+
+
+meal_index = MealIndex()
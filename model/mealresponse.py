@@ -0,0 +1,221 @@
+# mealresponse.py
+from datetime import datetime, timedelta
+from sqlalchemy import delete, event, func, inspect, select
+from __init__ import app, db
+from model.foodlog import FoodLog
+from model.glucose import GlucoseRecord
+
+# Readings up to this long after a meal make up its glucose response
+RESPONSE_WINDOW = timedelta(hours=2)
+# The baseline is the last reading at most this long before the meal
+BASELINE_WINDOW = timedelta(minutes=30)
+
+class MealResponse(db.Model):
+    """
+    MealResponse Model
+
+    The MealResponse class stores the glucose response measured after a logged meal: the reading just before it,
+    the highest reading in the two hours after it, and their difference, the post-meal excursion.
+
+    Attributes:
+        id (db.Column): The primary key.
+        food_log_id (db.Column): The logged meal, one response per meal.
+        user_id (db.Column): The user who logged the meal.
+        baseline (db.Column): The last glucose reading in the 30 minutes before the meal, None without one.
+        peak (db.Column): The highest glucose reading in the 2 hours after the meal, None without readings.
+        excursion (db.Column): The peak minus the baseline, None unless both are known.
+        readings (db.Column): The number of readings in the 2 hours after the meal.
+        computed (db.Column): The time the response was last computed.
+    """
+    __tablename__ = 'meal_responses'
+    __table_args__ = (db.Index('ix_meal_responses_user_id', 'user_id'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    food_log_id = db.Column(db.Integer, db.ForeignKey('food_logs.id'), unique=True, nullable=False)
+    user_id = db.Column(db.Integer, nullable=False)
+    baseline = db.Column(db.Float, nullable=True)
+    peak = db.Column(db.Float, nullable=True)
+    excursion = db.Column(db.Float, nullable=True)
+    readings = db.Column(db.Integer, nullable=False, default=0)
+    computed = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"MealResponse(food_log_id={self.food_log_id}, baseline={self.baseline}, peak={self.peak}, excursion={self.excursion})"
+
+    @staticmethod
+    def report(user_id, limit=50):
+        """
+        Returns a user's latest meals with their glucose response, and the average excursion per impact.
+
+        Uses:
+            One joined query for the meals and one grouped query for the averages.
+
+        Args:
+            user_id (int): The user whose meals are read.
+            limit (int, optional): The maximum number of meals listed.
+
+        Returns:
+            dict: 'meals', newest first, and 'by_impact', mapping each impact to its meal count, the number of
+            meals with a measured excursion, and their average excursion.
+        """
+        rows = db.session.execute(
+            select(FoodLog.id, FoodLog.meal, FoodLog.impact, FoodLog.glycemic_load, FoodLog.timestamp,
+                   MealResponse.baseline, MealResponse.peak, MealResponse.excursion, MealResponse.readings)
+            .outerjoin(MealResponse, MealResponse.food_log_id == FoodLog.id)
+            .where(FoodLog.user_id == user_id)
+            .order_by(FoodLog.timestamp.desc(), FoodLog.id.desc())
+            .limit(limit)
+        )
+        meals = [{
+            'id': id, 'meal': meal, 'impact': impact, 'glycemic_load': glycemic_load, 'timestamp': timestamp.isoformat(),
+            'baseline': baseline, 'peak': peak, 'excursion': excursion, 'readings': readings or 0
+        } for id, meal, impact, glycemic_load, timestamp, baseline, peak, excursion, readings in rows]
+
+        averages = db.session.execute(
+            select(FoodLog.impact, func.count(FoodLog.id), func.count(MealResponse.excursion), func.avg(MealResponse.excursion))
+            .outerjoin(MealResponse, MealResponse.food_log_id == FoodLog.id)
+            .where(FoodLog.user_id == user_id)
+            .group_by(FoodLog.impact)
+        )
+        by_impact = {
+            impact: {'meals': meals_count, 'measured': measured, 'average_excursion': round(average, 2) if average is not None else None}
+            for impact, meals_count, measured, average in averages
+        }
+        return {'meals': meals, 'by_impact': by_impact}
+
+    @staticmethod
+    def recompute(user_id=None):
+        """
+        Recomputes the responses of every meal, or of one user's meals, in one transaction.
+
+        Args:
+            user_id (int, optional): Only recompute this user's meals.
+
+        Returns:
+            int: The number of meals processed.
+        """
+        connection = db.session.connection()
+        query = select(FoodLog.user_id).distinct()
+        if user_id is not None:
+            query = query.where(FoodLog.user_id == user_id)
+        count = 0
+        for (owner_id,) in connection.execute(query).all():
+            count += refresh_responses(connection, owner_id)
+        db.session.commit()
+        return count
+
+
+def measure(meals, readings):
+    """
+    Measures the glucose response of each meal with a sorted merge of the two time series.
+
+    Meals and readings are both sorted by time, so a single pointer into the readings only ever moves forward:
+    readings older than the baseline window of the current meal can never matter to a later meal. Each meal then
+    only scans the readings inside its own window, instead of querying the database once per meal.
+
+    Args:
+        meals (list): (food log id, timestamp) pairs sorted by timestamp.
+        readings (list): (time, value) pairs sorted by time.
+
+    Returns:
+        list: A dictionary per meal with its food_log_id, baseline, peak, excursion and readings count.
+    """
+    results = []
+    start = 0
+    for food_log_id, eaten in meals:
+        while start < len(readings) and readings[start][0] < eaten - BASELINE_WINDOW:
+            start += 1
+        baseline, peak, count = None, None, 0
+        # Walk by index, a slice would copy every remaining reading for each meal
+        index = start
+        while index < len(readings) and readings[index][0] <= eaten + RESPONSE_WINDOW:
+            time, value = readings[index]
+            index += 1
+            if time <= eaten:
+                baseline = value
+            else:
+                peak = value if peak is None else max(peak, value)
+                count += 1
+        excursion = round(peak - baseline, 2) if peak is not None and baseline is not None else None
+        results.append({
+            'food_log_id': food_log_id, 'baseline': baseline, 'peak': peak, 'excursion': excursion, 'readings': count
+        })
+    return results
+
+def refresh_responses(connection, user_id, start=None, end=None):
+    """
+    Recomputes and stores the responses of a user's meals eaten between start and end, inside the caller's transaction.
+
+    Uses:
+        One range query for the meals and one for the readings that can affect them, both on (user, time) indexes.
+
+    Args:
+        connection: The connection (or session) of the triggering write.
+        user_id (int): The user whose meals are refreshed.
+        start (datetime, optional): The earliest meal time, all meals when omitted.
+        end (datetime, optional): The latest meal time, all meals when omitted.
+
+    Returns:
+        int: The number of meals refreshed.
+    """
+    logs, records, responses = FoodLog.__table__, GlucoseRecord.__table__, MealResponse.__table__
+    meal_query = select(logs.c['id'], logs.c['timestamp']).where(logs.c['user_id'] == user_id)
+    reading_query = select(records.c['time'], records.c['value']).where(records.c['user_id'] == user_id)
+    if start is not None:
+        meal_query = meal_query.where(logs.c['timestamp'] >= start)
+        reading_query = reading_query.where(records.c['time'] >= start - BASELINE_WINDOW)
+    if end is not None:
+        meal_query = meal_query.where(logs.c['timestamp'] <= end)
+        reading_query = reading_query.where(records.c['time'] <= end + RESPONSE_WINDOW)
+    meals = connection.execute(meal_query.order_by(logs.c['timestamp'], logs.c['id'])).all()
+    if not meals:
+        return 0
+    readings = connection.execute(reading_query.order_by(records.c['time'], records.c['id'])).all()
+
+    results = measure(meals, readings)
+    now = datetime.utcnow()
+    connection.execute(delete(responses).where(responses.c['food_log_id'].in_([meal[0] for meal in meals])))
+    connection.execute(responses.insert(), [dict(result, user_id=user_id, computed=now) for result in results])
+    return len(results)
+
+
+def _values(target, attribute):
+    """
+    Returns the current value of an attribute along with the value it had before this flush, if it changed.
+    """
+    return {getattr(target, attribute), *getattr(inspect(target).attrs, attribute).history.deleted} - {None}
+
+@event.listens_for(FoodLog, 'after_insert')
+def _meal_logged(mapper, connection, target):
+    refresh_responses(connection, target.user_id, target.timestamp, target.timestamp)
+
+@event.listens_for(FoodLog, 'after_update')
+def _meal_changed(mapper, connection, target):
+    # Refresh the meal's previous and new user and time, so its response follows it when it is moved
+    for user_id in _values(target, 'user_id'):
+        for timestamp in _values(target, 'timestamp'):
+            refresh_responses(connection, user_id, timestamp, timestamp)
+
+@event.listens_for(FoodLog, 'before_delete')
+def _meal_deleted(mapper, connection, target):
+    table = MealResponse.__table__
+    connection.execute(delete(table).where(table.c['food_log_id'] == target.id))
+
+@event.listens_for(GlucoseRecord, 'after_insert')
+@event.listens_for(GlucoseRecord, 'after_update')
+@event.listens_for(GlucoseRecord, 'after_delete')
+def _reading_changed(mapper, connection, target):
+    # A reading can be the baseline of the meals just after it, or part of the response to meals before it
+    # A changed reading also leaves the window of its previous time, and the meals of its previous user
+    for user_id in _values(target, 'user_id'):
+        for time in _values(target, 'time'):
+            refresh_responses(connection, user_id, time - RESPONSE_WINDOW, time + BASELINE_WINDOW)
+
+
+def initMealResponses():
+    """
+    The initMealResponses function creates the MealResponse table and computes the response of every logged meal.
+    """
+    with app.app_context():
+        db.create_all()
+        MealResponse.recompute()
@@ -1,9 +1,10 @@
 import base64
 import os
-from werkzeug.utils import secure_filename
 from __init__ import app
+from model.blob import Blob, blob_path, is_blob
+from model.thumbnail import best_variant
 
-def nestImg_base64_decode(user_id, imageURL):
+def nestImg_base64_decode(user_id, imageURL, size=None):
     """
     Reads a user's profile picture from the server.
 
@@ -13,11 +14,15 @@ def nestImg_base64_decode(user_id, imageURL):
     Parameters:
     - user_id (str): The unique identifier for the user.
     - user_pfp (str): The filename of the user's profile picture.
+    - size (int, optional): One of the thumbnail SIZES to read instead of the original image.
 
     Returns:
     - str: The base64 encoded image if the user has a profile picture; otherwise, None.
     """
-    img_path = os.path.join(app.config['UPLOAD_FOLDER'], user_id, imageURL)
+    if is_blob(imageURL):
+        img_path = best_variant(blob_path(imageURL), size)
+    else:
+        img_path = best_variant(os.path.join(app.config['UPLOAD_FOLDER'], user_id, imageURL), size)
     try:
         with open(img_path, 'rb') as img_file:
             base64_encoded = base64.b64encode(img_file.read()).decode('utf-8')
@@ -26,31 +31,23 @@ def nestImg_base64_decode(user_id, imageURL):
         print(f'An error occurred while reading the post picture: {str(e)}')
         return None
 
-def nestImg_base64_upload(base64_image, user_uid):
+def nestImg_base64_upload(base64_image, user_uid=None):
     """
-    Uploads a base64 encoded image as a profile picture for a user.
+    Uploads a base64 encoded image as a post picture.
 
-    This function decodes a base64 encoded image and saves it to a secure location on the server.
-    It organizes images by storing each user's image in a separate directory within the UPLOAD_FOLDER.
-    This approach helps to avoid filename conflicts and ensures better organization of files.
+    This function decodes a base64 encoded image and saves it in the content-addressed blob store, where it is
+    named after the hash of its content, so pictures of different posts never overwrite each other.
 
     Parameters:
     - base64_image (str): The base64 encoded image to be uploaded.
-    - user_uid (str): The unique identifier for the user.
+    - user_uid (str, optional): The unique identifier for the user, unused since pictures are stored by content.
 
     Returns:
-    - str: The filename of the saved image if the upload is successful; otherwise, None.
+    - str: The blob name of the saved image if the upload is successful; otherwise, None.
     """
     try:
         image_data = base64.b64decode(base64_image)
-        filename = secure_filename(f'{user_uid}.png')
-        user_dir = os.path.join(app.config['UPLOAD_FOLDER'], user_uid)
-        if not os.path.exists(user_dir):
-            os.makedirs(user_dir)
-        file_path = os.path.join(user_dir, filename)
-        with open(file_path, 'wb') as img_file:
-            img_file.write(image_data)
-        return filename 
+        return Blob.store_bytes(image_data)
     except Exception as e:
         print (f'An error occurred while updating the post picture: {str(e)}')
-        return None
\ No newline at end of file
+        return None
@@ -4,6 +4,8 @@ from sqlalchemy import Text
 from __init__ import app, db
 from model.user import User
 from model.group import Group
+from model.search import indexed
+from model.blob import referenced
 
 class NestPost(db.Model):
     """
@@ -128,6 +130,9 @@ class NestPost(db.Model):
             db.session.rollback()
             raise e
 
+indexed(NestPost, 'nestpost', title='_title', body='_content')
+referenced(NestPost, '_image_url')
+
 def initNestPosts():
     """
     The initPosts function creates the Post table and adds tester data to the table.
@@ -1,7 +1,78 @@
 import base64
+import hashlib
 import os
-from werkzeug.utils import secure_filename
+import threading
 from __init__ import app
+from model.blob import CHUNK_SIZE, Blob, blob_path, blob_url, is_blob
+from model.thumbnail import FORMAT, best_variant, delete_variants
+
+# File path -> ((modification time, size), content hash), so a picture is only hashed again after it changes
+_hashes = {}
+_hashes_lock = threading.Lock()
+
+def pfp_path(user_uid, user_pfp):
+    """
+    Returns the path of a user's profile picture on the server, in the blob store or, for pictures uploaded
+    before it, in the user's own directory.
+    """
+    if is_blob(user_pfp):
+        return blob_path(user_pfp)
+    return os.path.join(app.config['UPLOAD_FOLDER'], user_uid, user_pfp)
+
+def pfp_url(user_uid, user_pfp, size=None):
+    """
+    Returns the URL of a user's profile picture, or of one of its thumbnails when a size is given.
+
+    Blobs get their immutable URL. Pictures uploaded before the blob store are served from /uploads, using a
+    thumbnail only when one has been generated from the current file.
+
+    Parameters:
+    - user_uid (str): The unique identifier for the user.
+    - user_pfp (str): The filename of the user's profile picture.
+    - size (int, optional): One of the thumbnail SIZES.
+
+    Returns:
+    - str: The URL, or None if the user has no profile picture.
+    """
+    if not user_pfp:
+        return None
+    if is_blob(user_pfp):
+        return blob_url(user_pfp, size)
+    img_path = best_variant(pfp_path(user_uid, user_pfp), size)
+    return '/uploads/' + os.path.relpath(img_path, app.config['UPLOAD_FOLDER']).replace(os.sep, '/')
+
+def pfp_etag(img_path):
+    """
+    Returns a strong entity tag for an image file, the SHA-256 of its content.
+
+    A blob is already named after that hash, other files are hashed once and the hash is remembered per path,
+    only being recomputed when the file's modification time or size changes.
+
+    Parameters:
+    - img_path (str): The path of the image file.
+
+    Returns:
+    - str: The hex digest of the file content.
+
+    Raises:
+    - OSError: The file cannot be read.
+    """
+    stat = os.stat(img_path)
+    name = os.path.basename(img_path)
+    if is_blob(name):
+        return name.split('.')[0]
+    version = (stat.st_mtime_ns, stat.st_size)
+    with _hashes_lock:
+        cached = _hashes.get(img_path)
+    if cached and cached[0] == version:
+        return cached[1]
+    digest = hashlib.sha256()
+    with open(img_path, 'rb') as img_file:
+        for chunk in iter(lambda: img_file.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    with _hashes_lock:
+        _hashes[img_path] = (version, digest.hexdigest())
+    return digest.hexdigest()
 
 def pfp_base64_decode(user_id, user_pfp):
     """
@@ -17,7 +88,7 @@ def pfp_base64_decode(user_id, user_pfp):
     Returns:
     - str: The base64 encoded image if the user has a profile picture; otherwise, None.
     """
-    img_path = os.path.join(app.config['UPLOAD_FOLDER'], user_id, user_pfp)
+    img_path = pfp_path(user_id, user_pfp)
     try:
         with open(img_path, 'rb') as img_file:
             base64_encoded = base64.b64encode(img_file.read()).decode('utf-8')
@@ -26,41 +97,85 @@ def pfp_base64_decode(user_id, user_pfp):
         print(f'An error occurred while reading the profile picture: {str(e)}')
         return None
 
-def pfp_base64_upload(base64_image, user_uid):
+def pfp_thumbnail_data_uri(user_uid, user_pfp, size):
+    """
+    Reads a thumbnail of a user's profile picture as a base64 data URI, for embedding in a response.
+
+    Parameters:
+    - user_uid (str): The unique identifier for the user.
+    - user_pfp (str): The filename of the user's profile picture.
+    - size (int): One of the thumbnail SIZES.
+
+    Returns:
+    - str: The data URI, or None if the thumbnail has not been generated or cannot be read.
+    """
+    img_path = pfp_path(user_uid, user_pfp)
+    variant = best_variant(img_path, size)
+    if variant == img_path:
+        return None
+    try:
+        with open(variant, 'rb') as img_file:
+            return f'data:image/{FORMAT.lower()};base64,' + base64.b64encode(img_file.read()).decode('utf-8')
+    except OSError:
+        return None
+
+def pfp_base64_upload(base64_image, user_uid=None):
     """
     Uploads a base64 encoded image as a profile picture for a user.
 
-    This function decodes a base64 encoded image and saves it to a secure location on the server.
-    It organizes images by storing each user's image in a separate directory within the UPLOAD_FOLDER.
-    This approach helps to avoid filename conflicts and ensures better organization of files.
+    This function decodes a base64 encoded image and saves it in the content-addressed blob store, where it is
+    named after the hash of its content, so the same picture uploaded twice is only stored once.
 
     Parameters:
     - base64_image (str): The base64 encoded image to be uploaded.
-    - user_uid (str): The unique identifier for the user.
+    - user_uid (str, optional): The unique identifier for the user, unused since pictures are stored by content.
 
     Returns:
-    - str: The filename of the saved image if the upload is successful; otherwise, None.
+    - str: The blob name of the saved image if the upload is successful; otherwise, None.
+
+    Raises:
+    - ValueError: The data is not a supported image.
     """
     try:
         image_data = base64.b64decode(base64_image)
-        filename = secure_filename(f'{user_uid}.png')
-        user_dir = os.path.join(app.config['UPLOAD_FOLDER'], user_uid)
-        if not os.path.exists(user_dir):
-            os.makedirs(user_dir)
-        file_path = os.path.join(user_dir, filename)
-        with open(file_path, 'wb') as img_file:
-            img_file.write(image_data)
-        return filename 
-    except Exception as e:
+    except ValueError as e:
+        raise ValueError(f'Invalid base64 image data: {str(e)}')
+    try:
+        return Blob.store_bytes(image_data)
+    except OSError as e:
         print (f'An error occurred while updating the profile picture: {str(e)}')
         return None
     
+def pfp_stream_upload(stream, max_size=None):
+    """
+    Saves an uploaded image read from a stream as a profile picture, without holding it in memory.
+
+    The stream is copied in chunks into the content-addressed blob store, see Blob.store, after checking the
+    first bytes are a supported image. Files there never change, so readers never see a partly written picture.
+
+    Parameters:
+    - stream: A binary file-like object, e.g. the request body or an uploaded file.
+    - max_size (int, optional): The largest accepted image in bytes, MAX_CONTENT_LENGTH by default.
+
+    Returns:
+    - str: The blob name of the saved image, or None if it could not be written.
+
+    Raises:
+    - ValueError: The data is not a supported image or is larger than max_size.
+    """
+    try:
+        return Blob.store(stream, max_size)
+    except OSError as e:
+        print(f'An error occurred while saving the profile picture: {str(e)}')
+        return None
+
 def pfp_file_delete(user_uid, filename):
     """
     Deletes the profile picture file from the server.
 
-    This function removes a file from the server's filesystem. It is typically used to delete profile pictures
-    when a user updates their image or removes it entirely.
+    This function removes a file, and its thumbnails, from the server's filesystem. It is typically used to delete profile pictures
+    when a user updates their image or removes it entirely. Blobs may be shared with other rows, so they are left
+    for Blob.collect to remove once nothing references them.
 
     Parameters:
     - user_uid (str): The unique identifier for the user.
@@ -69,10 +184,13 @@ def pfp_file_delete(user_uid, filename):
     Returns:
     - bool: True if the file was deleted successfully; otherwise, False.
     """
+    if is_blob(filename):
+        return True
     try:
         img_path = os.path.join(app.config['UPLOAD_FOLDER'], user_uid, filename)
         if os.path.exists(img_path):
             os.remove(img_path)
+        delete_variants(img_path)
         # Success is when the file does not exist after calling this function
         return True 
     except Exception as e:
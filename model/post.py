@@ -1,11 +1,13 @@
 # post.py
 import logging
+from datetime import datetime
 from sqlite3 import IntegrityError
 from sqlalchemy import Text, JSON
 from sqlalchemy.exc import IntegrityError
 from __init__ import app, db
 from model.user import User
 from model.channel import Channel
+from model.search import indexed, search_index
 
 class Post(db.Model):
     """
@@ -20,8 +22,18 @@ class Post(db.Model):
         _content (db.Column): A JSON blob representing the content of the post.
         _user_id (db.Column): An integer representing the user who created the post.
         _channel_id (db.Column): An integer representing the channel to which the post belongs.
+        _upvotes (db.Column): An integer counting the upvotes on the post, maintained by the Vote model.
+        _downvotes (db.Column): An integer counting the downvotes on the post, maintained by the Vote model.
+        _star_sum (db.Column): The sum of the star ratings given to the post, maintained by the Rating model.
+        _star_count (db.Column): The number of star ratings given to the post, maintained by the Rating model.
+        _comment_count (db.Column): The number of feedback comments on the post, maintained by the Feedback model.
+        _created (db.Column): The time the post was created.
     """
     __tablename__ = 'posts'
+    __table_args__ = (
+        db.Index('ix_posts_channel_id_id', '_channel_id', 'id'),
+        db.Index('ix_posts_user_id_created', '_user_id', '_created'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     _title = db.Column(db.String(255), nullable=False)
@@ -30,6 +42,12 @@ class Post(db.Model):
     _user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     _channel_id = db.Column(db.Integer, db.ForeignKey('channels.id'), nullable=False)
     _stars = db.Column(db.Integer, nullable=True, default=0)  # New column for star ratings
+    _upvotes = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    _downvotes = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    _star_sum = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    _star_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    _comment_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    _created = db.Column(db.DateTime, nullable=True, default=datetime.utcnow)
 
     def __init__(self, title, comment, user_id=None, channel_id=None, content={}, stars=0, user_name=None, channel_name=None):
         self._title = title
@@ -70,23 +88,89 @@ class Post(db.Model):
         The read method retrieves the object data from the object's attributes and returns it as a dictionary.
         
         Uses:
-            The Channel.query and User.query methods to retrieve the channel and user objects.
+            The read_many method to resolve the user and channel names.
         
         Returns:
             dict: A dictionary containing the post data, including user and channel names.
         """
-        user = User.query.get(self._user_id)
-        channel = Channel.query.get(self._channel_id)
-        data = {
+        return Post.read_many([self])[0]
+
+    @staticmethod
+    def read_many(posts):
+        """
+        Converts a list of posts to dictionaries, resolving user and channel names for the whole list at once.
+        
+        Uses:
+            One IN query for the distinct user ids and one for the distinct channel ids, instead of two queries per post.
+        
+        Args:
+            posts (list): The Post objects to convert.
+        
+        Returns:
+            list: A dictionary per post, in the same order, including user and channel names.
+        """
+        user_ids = {post._user_id for post in posts}
+        channel_ids = {post._channel_id for post in posts}
+        user_names = dict(db.session.query(User.id, User._name).filter(User.id.in_(user_ids)).all()) if user_ids else {}
+        channel_names = dict(db.session.query(Channel.id, Channel._name).filter(Channel.id.in_(channel_ids)).all()) if channel_ids else {}
+        return [post._to_dict(user_names.get(post._user_id), channel_names.get(post._channel_id)) for post in posts]
+
+    @staticmethod
+    def feed(channel_id, before=None, limit=20, user_id=None, min_stars=None):
+        """
+        Returns one page of a channel's posts, newest first, using the id of the last post seen as the cursor.
+        
+        Uses:
+            The (channel_id, id) index, so a page costs the same however many posts the channel holds.
+        
+        Args:
+            channel_id (int): The channel to read.
+            before (int, optional): Only return posts with an id lower than this cursor.
+            limit (int, optional): The maximum number of posts in the page.
+            user_id (int, optional): Only return posts by this author.
+            min_stars (int, optional): Only return rated posts with an average of at least this many stars.
+        
+        Returns:
+            tuple: The list of post dictionaries and the cursor for the next page, None on the last page.
+        """
+        query = Post.query.filter(Post._channel_id == channel_id)
+        if before is not None:
+            query = query.filter(Post.id < before)
+        if user_id is not None:
+            query = query.filter(Post._user_id == user_id)
+        if min_stars is not None:
+            # Compare the sum rather than the average, so the filter needs no division per row
+            query = query.filter(Post._star_count > 0, Post._star_sum >= min_stars * Post._star_count)
+        # Read one extra row to find out whether another page follows
+        posts = query.order_by(Post.id.desc()).limit(limit + 1).all()
+        next_cursor = posts[limit - 1].id if len(posts) > limit else None
+        return Post.read_many(posts[:limit]), next_cursor
+
+    @property
+    def star_average(self):
+        """
+        Returns the average star rating of the post, None when it has not been rated.
+        """
+        if not self._star_count:
+            return None
+        return round(self._star_sum / self._star_count, 2)
+
+    def _to_dict(self, user_name, channel_name):
+        return {
             "id": self.id,
             "title": self._title,
             "comment": self._comment,
             "content": self._content,
-            "stars": self._stars, 
-            "user_name": user.name if user else None,
-            "channel_name": channel.name if channel else None
+            # Kept for clients of the old stars field, now the average rating, 0 when unrated
+            "stars": self.star_average or 0,
+            "upvotes": self._upvotes or 0,
+            "downvotes": self._downvotes or 0,
+            "star_average": self.star_average,
+            "star_count": self._star_count or 0,
+            "comment_count": self._comment_count or 0,
+            "user_name": user_name,
+            "channel_name": channel_name
         }
-        return data
     
 
     def update(self, data):
@@ -138,10 +222,76 @@ class Post(db.Model):
             db.session.rollback()
             raise e
         
+    @staticmethod
+    def bulk_create(items, user_id, chunk_size=500):
+        """
+        Validates a list of post data and inserts every valid post in a single transaction.
+        
+        Uses:
+            One IN query to check the channels, then one executemany INSERT per chunk of posts.
+        
+        Args:
+            items (list): Dictionaries with title, comment, channel_id and optional content and stars.
+            user_id (int): The user who creates the posts.
+            chunk_size (int, optional): The number of posts per INSERT execution.
+        
+        Returns:
+            dict: The success and error counts, with an error per rejected item giving its index and a message.
+        """
+        results = {'errors': [], 'success_count': 0, 'error_count': 0}
+        channel_ids = {item.get('channel_id') for item in items if isinstance(item, dict) and isinstance(item.get('channel_id'), int)}
+        known_channels = {id for (id,) in db.session.query(Channel.id).filter(Channel.id.in_(channel_ids))}
+
+        rows = []
+        for index, item in enumerate(items):
+            message = None
+            if not isinstance(item, dict):
+                message = 'Expected post data'
+            elif not item.get('title') or not isinstance(item['title'], str):
+                message = 'Post title is required and must be text'
+            elif not item.get('comment') or not isinstance(item['comment'], str):
+                message = 'Post comment is required and must be text'
+            elif item.get('channel_id') not in known_channels:
+                message = 'Channel not found'
+            elif len(item['title']) > 255 or len(item['comment']) > 255:
+                message = 'Post title and comment are limited to 255 characters'
+            if message:
+                results['errors'].append({'index': index, 'message': message})
+                continue
+            rows.append({
+                '_title': item['title'],
+                '_comment': item['comment'],
+                '_content': item.get('content') or {},
+                '_user_id': user_id,
+                '_channel_id': item['channel_id'],
+                '_stars': item.get('stars') or 0
+            })
+
+        try:
+            last_id = db.session.query(db.func.max(Post.id)).scalar() or 0
+            for start in range(0, len(rows), chunk_size):
+                db.session.execute(Post.__table__.insert(), rows[start:start + chunk_size])
+            # The executemany insert skips the ORM events, so index the new posts for search here
+            search_index.write_since(db.session, 'post', last_id)
+            db.session.commit()
+            results['success_count'] = len(rows)
+        except IntegrityError as e:
+            db.session.rollback()
+            logging.warning(f"IntegrityError: Could not bulk create {len(rows)} posts due to {str(e)}.")
+            results['errors'].append({'index': None, 'message': 'Database error, no posts were created'})
+        results['error_count'] = len(items) - results['success_count']
+        return results
+
     @staticmethod
     def restore(data):
         for post_data in data:
             post_id = post_data.pop('id', None)  # Remove 'id' from post_data
+            # Vote counters are derived from the votes table, not restored
+            post_data.pop('upvotes', None)
+            post_data.pop('downvotes', None)
+            post_data.pop('star_average', None)
+            post_data.pop('star_count', None)
+            post_data.pop('comment_count', None)
             title = post_data.get("title")
             post = Post.query.filter_by(_title=title).first()
             if post:
@@ -152,6 +302,9 @@ class Post(db.Model):
                 post = Post(**post_data)
                 post.create()
 
+
+indexed(Post, 'post', title='_title', body='_comment')
+
         
 def initPosts():
     """
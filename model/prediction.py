@@ -5,10 +5,12 @@ from sqlalchemy.exc import IntegrityError
 from __init__ import app, db  # Assuming __init__.py initializes app and db
 from datetime import datetime
 from model.user import User  # Import the User model
+from model.revision import track
 
 # DiabetesPrediction Model
 class DiabetesPrediction(db.Model):
     __tablename__ = 'diabetes_predictions'
+    __table_args__ = (db.Index('ix_diabetes_predictions_user_id_timestamp', 'user_id', 'timestamp'),)
 
     # Define user_id as a foreign key referencing the 'users' table
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)  # user_id foreign key
@@ -49,8 +51,9 @@ class DiabetesPrediction(db.Model):
             "timestamp": self.timestamp.isoformat()  # Format timestamp as ISO
         }
 
-    def update(self, data):
+    def update(self, data=None):
         """Updates the prediction with new data."""
+        data = data or {}
         self.probability = data.get('probability', self.probability)
         self.risk_level = data.get('risk_level', self.risk_level)
 
@@ -73,6 +76,8 @@ class DiabetesPrediction(db.Model):
             return None
         return self
 
+track(DiabetesPrediction, 'predictions', owner='user_id')
+
 # API routes to interact with diabetes predictions
 @app.route('/diabetes_predictions', methods=['GET'])
 def get_predictions():
@@ -0,0 +1,148 @@
+# rating.py
+from sqlalchemy import select, update
+from __init__ import db
+from model.post import Post
+from model.revision import insert_ignore
+
+class Rating(db.Model):
+    """
+    Rating Model
+
+    The Rating class represents the star rating a user gave a post. The post keeps the running sum and count of
+    its ratings, so its average is read without touching this table.
+
+    Attributes:
+        id (db.Column): The primary key, an integer representing the unique identifier for the rating.
+        _post_id (db.Column): An integer representing the ID of the rated post.
+        _user_id (db.Column): An integer representing the ID of the user who rated the post.
+        _stars (db.Column): An integer from 1 to 5, the rating itself.
+    """
+    __tablename__ = 'ratings'
+    __table_args__ = (db.UniqueConstraint('_post_id', '_user_id', name='uq_ratings_post_id_user_id'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    _post_id = db.Column(db.Integer, db.ForeignKey('posts.id'), nullable=False)
+    _user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    _stars = db.Column(db.Integer, nullable=False)
+
+    def __init__(self, post_id, user_id, stars):
+        self._post_id = post_id
+        self._user_id = user_id
+        self._stars = stars
+
+    def read(self):
+        """
+        Retrieve the rating data as a dictionary.
+        """
+        return {
+            "id": self.id,
+            "post_id": self._post_id,
+            "user_id": self._user_id,
+            "stars": self._stars
+        }
+
+    @staticmethod
+    def rate(post_id, user_id, stars):
+        """
+        Records a user's rating of a post, replacing their previous rating, and updates the post's sum and count.
+
+        Uses:
+            An INSERT that the unique (post, user) key turns into a no-op for a repeated rating. A new rating adds
+            to the post's sum and count; a changed one adds the difference to the sum. Each adjustment is a single
+            UPDATE computing from the stored values, so concurrent raters never overwrite each other.
+
+        Args:
+            post_id (int): ID of the rated post.
+            user_id (int): ID of the user rating it.
+            stars (int): The rating, 1 to 5.
+
+        Returns:
+            dict: The post's average and count of ratings, and the user's rating.
+        """
+        table = Rating.__table__
+        connection = db.session.connection()
+        try:
+            inserted = connection.execute(
+                insert_ignore(connection, table).values(_post_id=post_id, _user_id=user_id, _stars=stars)
+            ).rowcount
+            if inserted:
+                _adjust(connection, post_id, stars, 1)
+            else:
+                # The insert already holds the write lock on SQLite; lock the row elsewhere
+                previous = connection.execute(
+                    select(table.c['_stars'])
+                    .where(table.c['_post_id'] == post_id, table.c['_user_id'] == user_id)
+                    .with_for_update()
+                ).scalar()
+                if previous is not None and previous != stars:
+                    # Only the writer that actually replaced the previous value moves the sum
+                    changed = connection.execute(
+                        update(table)
+                        .where(table.c['_post_id'] == post_id, table.c['_user_id'] == user_id, table.c['_stars'] == previous)
+                        .values(_stars=stars)
+                    ).rowcount
+                    if changed:
+                        _adjust(connection, post_id, stars - previous, 0)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            raise e
+        return Rating.summary(post_id, user_id)
+
+    @staticmethod
+    def remove(post_id, user_id):
+        """
+        Deletes a user's rating of a post and takes it out of the post's sum and count.
+
+        Returns:
+            bool: True if the user had rated the post.
+        """
+        table = Rating.__table__
+        connection = db.session.connection()
+        try:
+            previous = connection.execute(
+                select(table.c['_stars'])
+                .where(table.c['_post_id'] == post_id, table.c['_user_id'] == user_id)
+                .with_for_update()
+            ).scalar()
+            deleted = 0
+            if previous is not None:
+                deleted = connection.execute(
+                    table.delete()
+                    .where(table.c['_post_id'] == post_id, table.c['_user_id'] == user_id, table.c['_stars'] == previous)
+                ).rowcount
+                if deleted:
+                    _adjust(connection, post_id, -previous, -1)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            raise e
+        return bool(deleted)
+
+    @staticmethod
+    def summary(post_id, user_id=None):
+        """
+        Returns the average and count of a post's ratings, and the given user's own rating.
+        """
+        post = db.session.get(Post, post_id)
+        if post is None:
+            return None
+        own = db.session.execute(
+            select(Rating._stars).where(Rating._post_id == post_id, Rating._user_id == user_id)
+        ).scalar() if user_id is not None else None
+        return {
+            "post_id": post.id,
+            "star_average": post.star_average,
+            "star_count": post._star_count,
+            "user_stars": own
+        }
+
+
+def _adjust(connection, post_id, stars, count):
+    table = Post.__table__
+    connection.execute(
+        update(table).where(table.c['id'] == post_id).values(
+            _star_sum=table.c['_star_sum'] + stars,
+            _star_count=table.c['_star_count'] + count
+        )
+    )
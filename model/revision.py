@@ -0,0 +1,127 @@
+# revision.py
+from itertools import chain
+from sqlalchemy import event, inspect, select, update
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from __init__ import db
+
+class Revision(db.Model):
+    """
+    Revision Model
+
+    The Revision class keeps a counter per collection (and optionally per owning user) that is bumped whenever
+    a row of a tracked model is inserted, updated or deleted. Endpoints use the counter as a cheap version to
+    answer conditional requests and to tell whether an in-memory cache is still current, without loading rows.
+
+    Attributes:
+        _collection (db.Column): The name of the tracked collection, e.g. 'glucose'.
+        _owner_id (db.Column): The id of the user owning the rows, 0 for the collection as a whole.
+        _counter (db.Column): The number of writes seen for the collection and owner.
+    """
+    __tablename__ = 'revisions'
+
+    _collection = db.Column(db.String(64), primary_key=True)
+    _owner_id = db.Column(db.Integer, primary_key=True, autoincrement=False, default=0)
+    _counter = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"Revision(collection={self._collection}, owner_id={self._owner_id}, counter={self._counter})"
+
+    @staticmethod
+    def current(collection, owner_id=0):
+        """
+        Returns the counter for a collection, 0 if it has never been written.
+
+        Args:
+            collection (str): The name of the tracked collection.
+            owner_id (int, optional): The owning user, 0 for the whole collection.
+
+        Returns:
+            int: The current counter.
+        """
+        counter = db.session.execute(
+            select(Revision._counter).where(Revision._collection == collection, Revision._owner_id == owner_id)
+        ).scalar()
+        return counter or 0
+
+    @staticmethod
+    def bump(connection, collection, owner_id=0):
+        """
+        Increments the counter for a collection inside the caller's transaction.
+
+        Args:
+            connection: The connection (or session) the triggering write is using.
+            collection (str): The name of the tracked collection.
+            owner_id (int, optional): The owning user, 0 for the whole collection.
+        """
+        table = Revision.__table__
+        connection.execute(insert_ignore(connection, table).values(_collection=collection, _owner_id=owner_id, _counter=0))
+        connection.execute(
+            update(table)
+            .where(table.c['_collection'] == collection, table.c['_owner_id'] == owner_id)
+            .values(_counter=table.c['_counter'] + 1)
+        )
+
+    @staticmethod
+    def etag(collection, owner_id=0):
+        """
+        Returns the current counter formatted as an entity tag for conditional responses.
+        """
+        return f"{collection}-{owner_id}-{Revision.current(collection, owner_id)}"
+
+
+def insert_ignore(connection, table):
+    """
+    Builds an INSERT for the connection's dialect that silently skips rows violating a unique key.
+
+    Args:
+        connection: The connection (or session) the statement will run on.
+        table (Table): The table to insert into.
+
+    Returns:
+        Insert: The dialect specific insert statement.
+    """
+    dialect = connection.get_bind().dialect.name if hasattr(connection, 'get_bind') else connection.dialect.name
+    if dialect == 'sqlite':
+        return sqlite.insert(table).on_conflict_do_nothing()
+    if dialect == 'postgresql':
+        return postgresql.insert(table).on_conflict_do_nothing()
+    if dialect in ('mysql', 'mariadb'):
+        return mysql.insert(table).prefix_with('IGNORE')
+    return table.insert()
+
+
+# Tracked model class -> (collection name, owner attribute name or None)
+_tracked = {}
+
+def track(model, collection, owner=None):
+    """
+    Registers a model so every flush that writes its rows bumps the collection revision.
+
+    The whole collection (owner 0) is always bumped; when an owner attribute is given the revision of the
+    owning user is bumped as well, including the previous owner when a row changes hands.
+
+    Args:
+        model (db.Model): The model class to track.
+        collection (str): The name of the collection.
+        owner (str, optional): The attribute holding the owning user's id.
+    """
+    _tracked[model] = (collection, owner)
+
+@event.listens_for(db.session, 'after_flush')
+def _bump_tracked(session, flush_context):
+    keys = set()
+    for obj in chain(session.new, session.dirty, session.deleted):
+        spec = _tracked.get(type(obj))
+        if spec is None:
+            continue
+        if obj in session.dirty and not session.is_modified(obj):
+            continue
+        collection, owner = spec
+        keys.add((collection, 0))
+        if owner:
+            history = inspect(obj).attrs[owner].history
+            for owner_id in chain(history.added, history.unchanged, history.deleted):
+                if owner_id is not None:
+                    keys.add((collection, owner_id))
+    for collection, owner_id in sorted(keys):
+        Revision.bump(session.connection(), collection, owner_id)
@@ -0,0 +1,71 @@
+# schema.py
+import logging
+from sqlalchemy import inspect
+from sqlalchemy.exc import DatabaseError
+from sqlalchemy.schema import AddConstraint
+from __init__ import app, db
+
+def upgrade_schema():
+    """
+    Brings the tables of an existing database up to date with the models, since db.create_all only creates
+    missing tables and never alters existing ones.
+
+    Adds the missing columns that are nullable or have a server default, creates the missing indexes, and adds
+    the missing foreign keys on databases that can alter constraints (SQLite cannot without rebuilding the table).
+    Every statement runs in its own transaction and a failing one is logged and skipped, so running this again,
+    or from several workers at once, is harmless.
+
+    Returns:
+        list: The statements that were applied.
+    """
+    applied = []
+    with app.app_context():
+        db.create_all()
+        engine = db.engine
+        dialect = engine.dialect
+        inspector = inspect(engine)
+        tables = set(inspector.get_table_names())
+        for table in db.metadata.sorted_tables:
+            if table.name not in tables:
+                continue
+            statements = []
+
+            columns = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in columns:
+                    continue
+                if not column.nullable and column.server_default is None:
+                    logging.warning(f"Cannot add the required column {table.name}.{column.name}, it has no server default.")
+                    continue
+                definition = f"{dialect.identifier_preparer.quote(column.name)} {column.type.compile(dialect)}"
+                if column.server_default is not None:
+                    definition += f" DEFAULT '{column.server_default.arg}'"
+                if not column.nullable:
+                    definition += " NOT NULL"
+                sql = f"ALTER TABLE {dialect.identifier_preparer.quote(table.name)} ADD COLUMN {definition}"
+                statements.append((sql, lambda connection, sql=sql: connection.exec_driver_sql(sql)))
+
+            indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+            statements.extend(
+                (f"CREATE INDEX {index.name} ON {table.name}", index.create)
+                for index in table.indexes if index.name not in indexes
+            )
+
+            if dialect.name != 'sqlite':
+                keys = {tuple(key['constrained_columns']) for key in inspector.get_foreign_keys(table.name)}
+                for key in table.foreign_key_constraints:
+                    columns = tuple(column.name for column in key.columns)
+                    if columns not in keys:
+                        statements.append((
+                            f"ALTER TABLE {table.name} ADD FOREIGN KEY ({', '.join(columns)}) REFERENCES {key.referred_table.name}",
+                            lambda connection, key=key: connection.execute(AddConstraint(key))
+                        ))
+
+            for description, apply in statements:
+                try:
+                    with engine.begin() as connection:
+                        apply(connection)
+                    applied.append(description)
+                except DatabaseError as e:
+                    logging.warning(f"Could not upgrade table {table.name}: {e}")
+    return applied
@@ -1,10 +1,21 @@
 from __init__ import app, db
 from datetime import datetime
+from sqlalchemy import and_, func, or_
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
+import bisect
 import logging
+import threading
+from model.leaderboard import LeaderboardBucket, bucketed
+from model.revision import Revision, track
 
 class Score(db.Model):
     __tablename__ = 'scores'
+    __table_args__ = (
+        db.Index('ix_scores_points_id', 'points', 'id'),
+        db.Index('ix_scores_user_id_points', 'user_id', 'points'),
+        db.Index('ix_scores_user_id_created', 'user_id', 'created'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -29,6 +40,7 @@ class Score(db.Model):
         try:
             db.session.add(self)
             db.session.commit()
+            top_scores.apply(self)
             return self
         except IntegrityError as e:
             db.session.rollback()
@@ -52,6 +64,7 @@ class Score(db.Model):
                 setattr(self, key, value)
         try:
             db.session.commit()
+            top_scores.apply(self)
             return self
         except IntegrityError as e:
             db.session.rollback()
@@ -62,12 +75,158 @@ class Score(db.Model):
         try:
             db.session.delete(self)
             db.session.commit()
+            top_scores.apply(self, deleted=True)
             return True
         except IntegrityError as e:
             db.session.rollback()
             logging.error(f"Error deleting score: {str(e)}")
             return False
 
+    @staticmethod
+    def rank(user_id, neighbors=2):
+        """
+        Finds a user's best score and its position on the leaderboard, with the scores around it.
+
+        The position is counted with the points index (scores ahead of the best one) instead of sorting the table,
+        using the leaderboard order: points descending, ties broken by id.
+
+        Args:
+            user_id (int): The user whose rank is wanted.
+            neighbors (int, optional): The number of scores to include above and below.
+
+        Returns:
+            dict: The best score, its rank and the neighboring scores, or None if the user has no scores.
+        """
+        best = Score.query.filter_by(user_id=user_id).order_by(Score.points.desc(), Score.id.asc()).first()
+        if best is None:
+            return None
+
+        ahead = or_(Score.points > best.points, and_(Score.points == best.points, Score.id < best.id))
+        behind = or_(Score.points < best.points, and_(Score.points == best.points, Score.id > best.id))
+        rank = db.session.query(func.count(Score.id)).filter(Score.points >= best.points, ahead).scalar() + 1
+
+        above = Score.query.options(joinedload(Score.user)).filter(Score.points >= best.points, ahead)\
+            .order_by(Score.points.asc(), Score.id.desc()).limit(neighbors).all()
+        below = Score.query.options(joinedload(Score.user)).filter(Score.points <= best.points, behind)\
+            .order_by(Score.points.desc(), Score.id.asc()).limit(neighbors).all()
+
+        return {
+            "user_id": user_id,
+            "rank": rank,
+            "score": best.read(),
+            "above": [dict(score.read(), rank=rank - offset) for offset, score in enumerate(above, start=1)][::-1],
+            "below": [dict(score.read(), rank=rank + offset) for offset, score in enumerate(below, start=1)]
+        }
+
+track(Score, 'scores', owner='user_id')
+bucketed(Score, 'scores', lambda score: {'user_id': score.user_id, 'value': score.points, 'day': score.created})
+
+class TopScores:
+    """
+    In-memory index of the highest scores, used to serve the leaderboard without sorting the scores table.
+
+    Rows are kept serialized (usernames included) and ordered by points descending, ties broken by id, which is
+    the same order as the SQL used to rebuild the index. Writes made through the Score model are applied in place;
+    when the index misses a write (another worker, or a change it cannot resolve locally) the 'scores' revision
+    no longer matches and the index is rebuilt from the database on the next read.
+    """
+    def __init__(self, capacity=100):
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._keys = []  # (-points, id), parallel to _rows
+        self._rows = []
+        self._complete = False  # True when every score in the table fits in the index
+        self._revision = None
+
+    @staticmethod
+    def _key(score):
+        return (-score.points, score.id)
+
+    def top(self, limit):
+        """
+        Returns the serialized top scores, best first.
+
+        Args:
+            limit (int): The number of scores wanted, at most the index capacity.
+
+        Returns:
+            list: Score dictionaries in leaderboard order.
+        """
+        revision = Revision.current('scores')
+        with self._lock:
+            if revision != self._revision:
+                self.rebuild(revision)
+            return self._rows[:max(limit, 0)]
+
+    def rebuild(self, revision=None):
+        """
+        Reloads the index from the database, joining the users in the same query.
+        """
+        scores = Score.query.options(joinedload(Score.user))\
+            .order_by(Score.points.desc(), Score.id.asc()).limit(self.capacity).all()
+        self._keys = [self._key(score) for score in scores]
+        self._rows = [score.read() for score in scores]
+        self._complete = len(scores) < self.capacity
+        self._revision = Revision.current('scores') if revision is None else revision
+
+    def apply(self, score, deleted=False):
+        """
+        Applies a committed create, update or delete of a score to the index.
+
+        Args:
+            score (Score): The score that was written.
+            deleted (bool, optional): True if the score was deleted.
+        """
+        revision = Revision.current('scores')
+        with self._lock:
+            if self._revision is None or revision == self._revision:
+                return
+            if revision != self._revision + 1:
+                self._revision = None  # missed a write elsewhere, rebuild on next read
+                return
+            self._revision = revision
+            present = self._discard(score.id)
+            key = None if deleted else self._key(score)
+            if key is not None and (self._complete or (self._keys and key < self._keys[-1])):
+                index = bisect.bisect_left(self._keys, key)
+                self._keys.insert(index, key)
+                self._rows.insert(index, score.read())
+                if len(self._keys) > self.capacity:
+                    self._keys.pop()
+                    self._rows.pop()
+                    self._complete = False
+            elif present and not self._complete:
+                self._revision = None  # the next best score is not in memory
+
+    def _discard(self, score_id):
+        for index, (_, key_id) in enumerate(self._keys):
+            if key_id == score_id:
+                del self._keys[index]
+                del self._rows[index]
+                return True
+        return False
+
+top_scores = TopScores()
+
+def top_in_bucket(period, day=None, limit=10):
+    """
+    Returns the best scores of a day or week, in the same shape as the all-time leaderboard.
+
+    Uses:
+        The (game, period, bucket, value) index for the ranking, then one IN query joined with the users.
+
+    Args:
+        period (str): 'day' or 'week'.
+        day (date, optional): A day inside the wanted bucket, today (UTC) by default.
+        limit (int, optional): The number of scores wanted.
+
+    Returns:
+        list: Score dictionaries, best first.
+    """
+    ids = LeaderboardBucket.top_entry_ids('scores', period, day, limit)
+    scores = {score.id: score for score in Score.query.options(joinedload(Score.user)).filter(Score.id.in_(ids))} if ids else {}
+    return [scores[id].read() for id in ids if id in scores]
+
 def init_scores():
     """Initialize sample scores (like your events)"""
     with app.app_context():
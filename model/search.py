@@ -0,0 +1,409 @@
+# search.py
+import heapq
+import math
+import re
+import threading
+from bisect import bisect_left, insort
+from collections import Counter, defaultdict
+from sqlalchemy import event, select, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import object_session
+from __init__ import app, db
+from model.revision import Revision
+
+# Kind of document -> code stored in the low bits of the index rowid, never renumber
+KINDS = {'post': 1, 'nestpost': 2, 'flashcard': 3}
+KIND_BITS = 3
+# Weight of a term found in the title relative to one found in the body
+TITLE_WEIGHT = 3.0
+SNIPPET_LENGTH = 160
+
+_TOKEN = re.compile(r'\w+')
+
+def tokenize(value):
+    """
+    Splits text into lower case word tokens, the same way for documents and queries.
+    """
+    return _TOKEN.findall((value or '').lower())
+
+def parse_query(query):
+    """
+    Splits a search query into terms, all of which must match.
+
+    A word ending in '*' is a prefix query, e.g. 'gluc*' matches 'glucose' and 'glucagon'.
+
+    Args:
+        query (str): The query typed by the user.
+
+    Returns:
+        list: (term, is_prefix) tuples.
+    """
+    terms = []
+    for word in (query or '').split():
+        tokens = tokenize(word)
+        terms.extend((token, False) for token in tokens)
+        if tokens and word.endswith('*'):
+            terms[-1] = (tokens[-1], True)
+    return terms
+
+def _key(kind, doc_id):
+    return (doc_id << KIND_BITS) | KINDS[kind]
+
+def _split_key(key):
+    code = key & ((1 << KIND_BITS) - 1)
+    kind = next(name for name, value in KINDS.items() if value == code)
+    return kind, key >> KIND_BITS
+
+def _result(key, title, body, score):
+    kind, doc_id = _split_key(key)
+    return {'kind': kind, 'id': doc_id, 'title': title, 'snippet': (body or '')[:SNIPPET_LENGTH], 'score': score}
+
+
+class FtsIndex:
+    """
+    Search index stored in an SQLite FTS5 virtual table, written in the same transaction as the documents.
+
+    The rowid of each index row encodes the document kind and id, so replacing or removing a document is a
+    rowid lookup rather than a scan.
+    """
+    table = 'search_index'
+
+    def exists(self, connection):
+        return connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {'name': self.table}
+        ).first() is not None
+
+    def create(self, connection):
+        connection.execute(text(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} USING fts5(title, body, tokenize = 'unicode61')"
+        ))
+
+    def write(self, connection, docs):
+        """
+        Adds or replaces documents given as (key, title, body) tuples.
+        """
+        if not docs:
+            return
+        self.remove(connection, [key for key, _, _ in docs])
+        connection.execute(
+            text(f"INSERT INTO {self.table} (rowid, title, body) VALUES (:key, :title, :body)"),
+            [{'key': key, 'title': title or '', 'body': body or ''} for key, title, body in docs]
+        )
+
+    def remove(self, connection, keys):
+        if keys:
+            connection.execute(text(f"DELETE FROM {self.table} WHERE rowid = :key"), [{'key': key} for key in keys])
+
+    def clear(self, connection):
+        connection.execute(text(f"DELETE FROM {self.table}"))
+
+    def search(self, connection, terms, kind=None, limit=20):
+        match = ' '.join(f'"{term}"*' if prefix else f'"{term}"' for term, prefix in terms)
+        where = f"AND (rowid & {(1 << KIND_BITS) - 1}) = :code" if kind else ""
+        rows = connection.execute(text(
+            f"SELECT rowid, title, body, bm25({self.table}, {TITLE_WEIGHT}, 1.0) AS rank FROM {self.table} "
+            f"WHERE {self.table} MATCH :match {where} ORDER BY rank LIMIT :limit"
+        ), {'match': match, 'code': KINDS.get(kind), 'limit': limit})
+        # bm25() is lower for better matches, flip it so a higher score ranks first
+        return [_result(key, title, body, -rank) for key, title, body, rank in rows]
+
+
+class MemoryIndex:
+    """
+    Inverted index held in process memory, used when the database has no full-text support.
+
+    Postings map each term to the weighted term frequency per document; a sorted term list answers prefix
+    queries with a binary search. Results are ranked with BM25.
+    """
+    k1 = 1.2
+    b = 0.75
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self._postings = defaultdict(dict)
+        self._terms = []
+        self._docs = {}
+        self._total_length = 0.0
+
+    def __len__(self):
+        return len(self._docs)
+
+    def add(self, key, title, body):
+        self.remove(key)
+        weights = Counter()
+        for term in tokenize(title):
+            weights[term] += TITLE_WEIGHT
+        for term in tokenize(body):
+            weights[term] += 1.0
+        length = sum(weights.values())
+        self._docs[key] = (title or '', body or '', length, tuple(weights))
+        self._total_length += length
+        for term, weight in weights.items():
+            if term not in self._postings:
+                insort(self._terms, term)
+            self._postings[term][key] = weight
+
+    def remove(self, key):
+        doc = self._docs.pop(key, None)
+        if doc is None:
+            return
+        self._total_length -= doc[2]
+        for term in doc[3]:
+            postings = self._postings[term]
+            postings.pop(key, None)
+            if not postings:
+                del self._postings[term]
+                del self._terms[bisect_left(self._terms, term)]
+
+    def _expand(self, term, prefix):
+        if not prefix:
+            return [term] if term in self._postings else []
+        start = bisect_left(self._terms, term)
+        end = start
+        while end < len(self._terms) and self._terms[end].startswith(term):
+            end += 1
+        return self._terms[start:end]
+
+    def search(self, terms, kind=None, limit=20):
+        if not self._docs:
+            return []
+        count = len(self._docs)
+        average = self._total_length / count or 1.0
+        code = KINDS.get(kind)
+        scores = None
+        # Match the rarest term first so the intersection starts small
+        groups = sorted((self._expand(term, prefix) for term, prefix in terms),
+                        key=lambda group: sum(len(self._postings[term]) for term in group))
+        for group in groups:
+            matched = {}
+            for term in group:
+                postings = self._postings[term]
+                idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for key, weight in postings.items():
+                    if scores is not None and key not in scores:
+                        continue
+                    if code and key & ((1 << KIND_BITS) - 1) != code:
+                        continue
+                    norm = self.k1 * (1 - self.b + self.b * self._docs[key][2] / average)
+                    matched[key] = matched.get(key, 0.0) + idf * weight * (self.k1 + 1) / (weight + norm)
+            scores = matched if scores is None else {key: scores[key] + score for key, score in matched.items()}
+            if not scores:
+                return []
+        best = heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], -item[0]))
+        return [_result(key, self._docs[key][0], self._docs[key][1], score) for key, score in best]
+
+
+# Indexed model class -> (kind, title attribute, body attribute)
+_sources = {}
+
+class SearchIndex:
+    """
+    Full-text search over the indexed models.
+
+    On SQLite the documents live in an FTS5 table kept up to date inside each write transaction, once initSearch
+    has created it. On other databases, and on SQLite until the table exists, each worker keeps a MemoryIndex:
+    local commits are applied incrementally, and when the 'search' revision shows writes from another worker the
+    index is rebuilt from the tables on the next query.
+    """
+
+    def __init__(self):
+        self.fts = FtsIndex()
+        self.memory = MemoryIndex()
+        self._lock = threading.Lock()
+        self._use_fts = None
+        self._revision = None
+
+    def uses_fts(self, connection):
+        """
+        Returns True when the database is SQLite and the FTS5 index table exists.
+
+        The table is never created here, inside whatever transaction the caller has open: if that transaction
+        rolled back, the process would keep using a table that does not exist. Only a committed table is
+        remembered, so on SQLite the check repeats until create_fts has run.
+        """
+        if self._use_fts is None:
+            if connection.dialect.name != 'sqlite':
+                self._use_fts = False
+            elif self.fts.exists(connection):
+                self._use_fts = True
+            else:
+                return False
+        return self._use_fts
+
+    def create_fts(self):
+        """
+        Creates and fills the FTS5 index table on a connection and transaction of its own.
+
+        Returns:
+            bool: True once the table is committed, False when SQLite was built without FTS5.
+        """
+        try:
+            with db.engine.begin() as connection:
+                self.fts.create(connection)
+                self.fts.clear(connection)
+                self._fill_fts(connection)
+        except OperationalError:
+            # SQLite built without FTS5
+            return False
+        self._use_fts = True
+        return True
+
+    def _fill_fts(self, connection):
+        for kind, title, body, model in _source_kinds():
+            table = model.__table__
+            rows = connection.execute(select(table.c['id'], table.c[title], table.c[body]))
+            self.fts.write(connection, [(_key(kind, id), t, b) for id, t, b in rows])
+
+    def write(self, session, kind, docs):
+        """
+        Adds or replaces documents of a kind, given as (id, title, body) tuples, as part of the session's transaction.
+        """
+        docs = [(_key(kind, doc_id), title, body) for doc_id, title, body in docs]
+        connection = session.connection()
+        if self.uses_fts(connection):
+            self.fts.write(connection, docs)
+        else:
+            session.info.setdefault('search_pending', []).extend(('write', doc) for doc in docs)
+
+    def remove(self, session, kind, doc_ids):
+        """
+        Removes documents of a kind from the index as part of the session's transaction.
+        """
+        keys = [_key(kind, doc_id) for doc_id in doc_ids]
+        connection = session.connection()
+        if self.uses_fts(connection):
+            self.fts.remove(connection, keys)
+        else:
+            session.info.setdefault('search_pending', []).extend(('remove', key) for key in keys)
+
+    def write_since(self, session, kind, last_id):
+        """
+        Indexes the documents of a kind with an id above last_id, e.g. after a bulk insert that skips the ORM.
+        """
+        model, title, body = next((model, title, body) for k, title, body, model in _source_kinds() if k == kind)
+        table = model.__table__
+        rows = session.execute(select(table.c['id'], table.c[title], table.c[body]).where(table.c['id'] > last_id))
+        self.write(session, kind, rows.all())
+
+    def search(self, query, kind=None, limit=20):
+        """
+        Returns the best matching documents for a query.
+
+        Args:
+            query (str): Words that must all appear in a document, a trailing '*' making a word a prefix.
+            kind (str, optional): Only return documents of this kind, a key of KINDS.
+            limit (int, optional): The maximum number of results.
+
+        Returns:
+            list: A dictionary per result with kind, id, title, snippet and score, best first.
+        """
+        terms = parse_query(query)
+        if not terms:
+            return []
+        connection = db.session.connection()
+        if self.uses_fts(connection):
+            return self.fts.search(connection, terms, kind, limit)
+        with self._lock:
+            revision = Revision.current('search')
+            if revision != self._revision:
+                self._rebuild(revision)
+            return self.memory.search(terms, kind, limit)
+
+    def rebuild(self):
+        """
+        Rebuilds the index from the indexed tables and commits, creating the FTS5 table on SQLite.
+        """
+        connection = db.session.connection()
+        if self.uses_fts(connection):
+            self.fts.clear(connection)
+            self._fill_fts(connection)
+            db.session.commit()
+            return
+        if connection.dialect.name == 'sqlite':
+            # End the session's transaction first, SQLite allows one writer and the table gets its own connection
+            db.session.commit()
+            if self.create_fts():
+                return
+        with self._lock:
+            self._rebuild(Revision.current('search'))
+
+    def _rebuild(self, revision):
+        self.memory.clear()
+        for kind, title, body, model in _source_kinds():
+            table = model.__table__
+            for id, t, b in db.session.execute(select(table.c['id'], table.c[title], table.c[body])):
+                self.memory.add(_key(kind, id), t, b)
+        self._revision = revision
+
+    def _flushed(self, session):
+        pending = session.info.pop('search_pending', None)
+        if pending:
+            connection = session.connection()
+            Revision.bump(connection, 'search')
+            revision = connection.execute(
+                select(Revision._counter).where(Revision._collection == 'search', Revision._owner_id == 0)
+            ).scalar()
+            session.info.setdefault('search_flushed', []).append((revision, pending))
+
+    def _committed(self, session):
+        flushed = session.info.pop('search_flushed', None)
+        if not flushed:
+            return
+        with self._lock:
+            for revision, pending in flushed:
+                # Only apply when no other worker wrote in between, otherwise rebuild on the next query
+                if self._revision is None or revision != self._revision + 1:
+                    self._revision = None
+                    return
+                for action, item in pending:
+                    if action == 'write':
+                        self.memory.add(*item)
+                    else:
+                        self.memory.remove(item)
+                self._revision = revision
+
+    def _rolled_back(self, session):
+        session.info.pop('search_pending', None)
+        session.info.pop('search_flushed', None)
+
+
+search_index = SearchIndex()
+
+def _source_kinds():
+    return [(kind, title, body, model) for model, (kind, title, body) in _sources.items()]
+
+def indexed(model, kind, title, body):
+    """
+    Registers a model so every insert, update and delete of its rows is reflected in the search index.
+
+    Args:
+        model (db.Model): The model class to index.
+        kind (str): The kind of document, a key of KINDS.
+        title (str): The attribute holding the document title.
+        body (str): The attribute holding the document body.
+    """
+    _sources[model] = (kind, title, body)
+    event.listen(model, 'after_insert', lambda mapper, connection, target: search_index.write(
+        object_session(target), kind, [(target.id, getattr(target, title), getattr(target, body))]))
+    event.listen(model, 'after_update', lambda mapper, connection, target: search_index.write(
+        object_session(target), kind, [(target.id, getattr(target, title), getattr(target, body))]))
+    event.listen(model, 'after_delete', lambda mapper, connection, target: search_index.remove(
+        object_session(target), kind, [target.id]))
+
+event.listen(db.session, 'after_flush', lambda session, flush_context: search_index._flushed(session))
+# Core writes such as Post.bulk_create leave the session without ORM changes, so commit() never flushes
+event.listen(db.session, 'before_commit', search_index._flushed)
+event.listen(db.session, 'after_commit', search_index._committed)
+event.listen(db.session, 'after_soft_rollback', lambda session, previous_transaction: search_index._rolled_back(session))
+
+
+def initSearch():
+    """
+    The initSearch function builds the search index from the posts, nest posts and flashcards.
+    On SQLite this creates the FTS5 index table, which full-text search uses from then on.
+    """
+    with app.app_context():
+        db.create_all()
+        search_index.rebuild()
@@ -1,6 +1,7 @@
 # section.py
 from sqlite3 import IntegrityError
 from __init__ import app, db
+from model.revision import track
 
 class Section(db.Model):
     """
@@ -116,6 +117,8 @@ class Section(db.Model):
         db.session.commit()
         return sections
 
+track(Section, 'hierarchy')
+
 def initSections():
     """
     The initSections function creates the Section table and adds tester data to the table.
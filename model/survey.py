@@ -1,3 +1,4 @@
+from datetime import datetime
 from flask import Flask, request, jsonify
 from sqlalchemy.exc import IntegrityError
 from __init__ import db
@@ -8,11 +9,13 @@ app = Flask(__name__)
 # Survey Model (Already defined, for reference)
 class Survey(db.Model):
     __tablename__ = 'surveys'
+    __table_args__ = (db.Index('ix_surveys_user_id_created', 'user_id', 'created'),)
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     message = db.Column(db.String(255), nullable=False)
     name = db.Column(db.String(100), nullable=True)  # New name field
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    created = db.Column(db.DateTime, nullable=True, default=datetime.utcnow)
 
     def __init__(self, message, user_id, name=None):  # Updated constructor
         self.message = message
@@ -0,0 +1,105 @@
+# thumbnail.py
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image, ImageOps, features
+
+# Longest side in pixels of each variant generated for an uploaded image
+SIZES = (64, 256, 1024)
+# WebP is much smaller than PNG at the same quality, PNG is kept for Pillow builds without libwebp
+FORMAT, EXTENSION = ('WEBP', '.webp') if features.check('webp') else ('PNG', '.png')
+
+# A small pool keeps resizing off the request threads without competing with them for every core
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='thumbnail')
+
+def variant_path(img_path, size):
+    """
+    Returns the path of an image's variant of the given size, next to the original, e.g. uid.png.64.webp.
+    """
+    return f'{img_path}.{size}{EXTENSION}'
+
+def _version(img_path):
+    stat = os.stat(img_path)
+    return stat.st_mtime_ns, stat.st_size
+
+def make_variants(img_path):
+    """
+    Generates every variant of an image, each scaled down to fit a SIZES square keeping its aspect ratio.
+
+    The image is turned upright from its EXIF orientation and each variant is scaled from the previous, larger one.
+    Variants are written to temporary files and renamed into place, and are only kept if the original did not change
+    meanwhile, so a slower job for an older upload never overwrites the variants of a newer one.
+
+    Parameters:
+    - img_path (str): The path of the original image.
+
+    Returns:
+    - bool: True if the variants were written, False if the image could not be read or was replaced meanwhile.
+    """
+    temp_path = None
+    try:
+        version = _version(img_path)
+        with Image.open(img_path) as image:
+            # JPEG can decode straight to a reduced scale, much faster than decoding every pixel of a photo
+            image.draft('RGB', (max(SIZES), max(SIZES)))
+            image = ImageOps.exif_transpose(image)
+            image = image.convert('RGBA' if image.has_transparency_data else 'RGB')
+        for size in sorted(SIZES, reverse=True):
+            image.thumbnail((size, size), Image.Resampling.LANCZOS)
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(img_path), suffix='.part')
+            with os.fdopen(fd, 'wb') as temp_file:
+                image.save(temp_file, FORMAT)
+            if _version(img_path) != version:
+                return False
+            os.replace(temp_path, variant_path(img_path, size))
+            temp_path = None
+        return True
+    except (OSError, ValueError, Image.DecompressionBombError) as e:
+        print(f'An error occurred while generating the thumbnails of {img_path}: {str(e)}')
+        return False
+    finally:
+        if temp_path and os.path.exists(temp_path):
+            os.remove(temp_path)
+
+def schedule_variants(img_path):
+    """
+    Queues the generation of an image's variants on the background worker pool, so uploads return immediately.
+
+    Parameters:
+    - img_path (str): The path of the original image.
+
+    Returns:
+    - Future: Resolves to the result of make_variants.
+    """
+    return _executor.submit(make_variants, img_path)
+
+def best_variant(img_path, size):
+    """
+    Returns the path to serve for an image at a requested size.
+
+    Parameters:
+    - img_path (str): The path of the original image.
+    - size (int): One of SIZES, or None for the original.
+
+    Returns:
+    - str: The variant when it has been generated from the current original; otherwise the original itself.
+    """
+    if size is None:
+        return img_path
+    path = variant_path(img_path, size)
+    try:
+        # A variant older than the original was made from a previous upload and is still being replaced
+        if os.stat(path).st_mtime_ns >= os.stat(img_path).st_mtime_ns:
+            return path
+    except OSError:
+        pass
+    return img_path
+
+def delete_variants(img_path):
+    """
+    Deletes every variant of an image, leaving the original.
+    """
+    for size in SIZES:
+        path = variant_path(img_path, size)
+        if os.path.exists(path):
+            os.remove(path)
@@ -0,0 +1,94 @@
+# timeline.py
+import heapq
+from datetime import datetime
+from itertools import islice
+from sqlalchemy import and_, or_, select
+from __init__ import db
+from model.post import Post
+from model.vote import Vote
+from model.scores import Score
+from model.glucose import GlucoseRecord
+from model.foodlog import FoodLog
+from model.prediction import DiabetesPrediction
+from model.survey import Survey
+
+# Event type -> (model, user id attribute, timestamp attribute, attributes copied into the event)
+# Every source has an index on (user id, timestamp), so each query is a bounded index range scan.
+SOURCES = {
+    'post': (Post, '_user_id', '_created', {'title': '_title', 'channel_id': '_channel_id'}),
+    'vote': (Vote, '_user_id', '_created', {'post_id': '_post_id', 'vote_type': '_vote_type'}),
+    'score': (Score, 'user_id', 'created', {'points': 'points', 'level': 'level'}),
+    'glucose': (GlucoseRecord, 'user_id', 'time', {'value': 'value', 'status': 'status'}),
+    'food_log': (FoodLog, 'user_id', 'timestamp', {'meal': 'meal', 'impact': 'impact'}),
+    'prediction': (DiabetesPrediction, 'user_id', 'timestamp', {'probability': 'probability', 'risk_level': 'risk_level'}),
+    'survey': (Survey, 'user_id', 'created', {'message': 'message'}),
+}
+
+def encode_cursor(event):
+    """
+    Returns the cursor pointing just past an event, as a string of its time, type and id.
+    """
+    return f"{event['time']}~{event['type']}~{event['id']}"
+
+def decode_cursor(cursor):
+    """
+    Splits a cursor made by encode_cursor.
+
+    Raises:
+        ValueError: The cursor is malformed or names an unknown event type.
+    """
+    time, kind, id = cursor.split('~')
+    if kind not in SOURCES:
+        raise ValueError(f"Unknown event type {kind}")
+    return datetime.fromisoformat(time), kind, int(id)
+
+def _events(kind, user_id, limit, before):
+    """
+    Yields at most limit events of one type for a user, newest first, starting after the cursor.
+    """
+    model, user_attr, time_attr, fields = SOURCES[kind]
+    time_column = getattr(model, time_attr)
+    columns = [model.id, time_column] + [getattr(model, attr) for attr in fields.values()]
+    query = select(*columns).where(getattr(model, user_attr) == user_id, time_column.isnot(None))
+    if before is not None:
+        # Events sort by (time, type, id) descending, so at the cursor's time only smaller keys follow
+        before_time, before_kind, before_id = before
+        same_time = time_column == before_time
+        if kind == before_kind:
+            same_time = and_(same_time, model.id < before_id)
+        elif kind > before_kind:
+            same_time = None
+        query = query.where(or_(time_column < before_time, same_time) if same_time is not None else time_column < before_time)
+    query = query.order_by(time_column.desc(), model.id.desc()).limit(limit)
+    for row in db.session.execute(query):
+        event = {'type': kind, 'id': row[0], 'time': row[1].isoformat(timespec='microseconds')}
+        event.update(zip(fields, row[2:]))
+        yield event
+
+def timeline(user_id, limit=20, cursor=None):
+    """
+    Returns a page of a user's activity across posts, votes, scores, glucose records, food logs, predictions
+    and surveys, newest first.
+
+    Uses:
+        One query per event type, each limited to the page size, merged lazily with heapq.merge; the page never
+        needs more than limit events from any one type.
+
+    Args:
+        user_id (int): The user whose activity is read.
+        limit (int, optional): The maximum number of events in the page.
+        cursor (str, optional): The next_cursor of the previous page.
+
+    Returns:
+        tuple: The list of event dictionaries and the cursor for the next page, None on the last page.
+
+    Raises:
+        ValueError: The cursor is malformed.
+    """
+    before = decode_cursor(cursor) if cursor else None
+    streams = [_events(kind, user_id, limit + 1, before) for kind in SOURCES]
+    merged = heapq.merge(*streams, key=lambda event: (event['time'], event['type'], event['id']), reverse=True)
+    # Read one extra event to find out whether another page follows
+    events = list(islice(merged, limit + 1))
+    next_cursor = encode_cursor(events[limit - 1]) if len(events) > limit else None
+    return events[:limit], next_cursor
@@ -8,6 +8,8 @@ import os
 import json
 
 from __init__ import app, db
+from model.blob import Blob, adjust_references, referenced
+from model.pfp import pfp_thumbnail_data_uri, pfp_url
 
 """ Helper Functions """
 
@@ -297,6 +299,15 @@ class User(db.Model, UserMixin):
         """
         self._pfp = pfp
 
+    def avatar_url(self, size=64):
+        """
+        Returns the URL of the user's profile picture thumbnail, None when no picture is set.
+        
+        Args:
+            size (int, optional): One of the thumbnail sizes, None for the full picture.
+        """
+        return pfp_url(self._uid, self._pfp, size)
+
     @property
     def car(self):
         return self._car
@@ -358,6 +369,7 @@ class User(db.Model, UserMixin):
         uid = inputs.get("uid", "")
         password = inputs.get("password", "")
         pfp = inputs.get("pfp", None)
+        car = inputs.get("car", None)
 
         # Update table with new data
         if name:
@@ -368,6 +380,8 @@ class User(db.Model, UserMixin):
             self.set_password(password)
         if pfp is not None:
             self.pfp = pfp
+        if car is not None:
+            self.car = car
 
         # Check this on each update
         self.set_email()
@@ -397,18 +411,17 @@ class User(db.Model, UserMixin):
         """
         Saves the user's profile picture.
         
+        The image is saved in the content-addressed blob store and the user references it by its blob name.
+        
         Args:
             image_data (bytes): The image data of the profile picture.
-            filename (str): The filename of the profile picture.
+            filename (str): The filename of the profile picture, unused since pictures are stored by content.
+        
+        Raises:
+            ValueError: The data is not a supported image.
         """
         try:
-            user_dir = os.path.join(app.config['UPLOAD_FOLDER'], self.uid)
-            if not os.path.exists(user_dir):
-                os.makedirs(user_dir)
-            file_path = os.path.join(user_dir, filename)
-            with open(file_path, 'wb') as img_file:
-                img_file.write(image_data)
-            self.update({"pfp": filename})
+            self.update({"pfp": Blob.store_bytes(image_data)})
         except Exception as e:
             raise e
         
@@ -423,18 +436,17 @@ class User(db.Model, UserMixin):
         """
         Saves the user's car picture.
         
+        The image is saved in the content-addressed blob store and the user references it by its blob name.
+        
         Args:
             image_data (bytes): The image data of the car picture.
-            filename (str): The filename of the car picture.
+            filename (str): The filename of the car picture, unused since pictures are stored by content.
+        
+        Raises:
+            ValueError: The data is not a supported image.
         """
         try:
-            user_dir = os.path.join(app.config['UPLOAD_FOLDER'], self.uid)
-            if not os.path.exists(user_dir):
-                os.makedirs(user_dir)
-            file_path = os.path.join(user_dir, filename)
-            with open(file_path, 'wb') as img_file:
-                img_file.write(image_data)
-            self.update({"car": filename})
+            self.update({"car": Blob.store_bytes(image_data)})
         except Exception as e:
             raise e
         
@@ -470,6 +482,92 @@ class User(db.Model, UserMixin):
             if os.path.exists(old_path):
                 os.rename(old_path, new_path)
                 
+    @staticmethod
+    def bulk_create(items, chunk_size=500):
+        """
+        Validates a list of user data and inserts every valid user in a single transaction.
+        
+        Uses:
+            One IN query to check the uids, then one executemany INSERT per chunk of users.
+        
+        All users get the default password, which is hashed once for the whole batch rather than per user.
+        
+        Args:
+            items (list): Dictionaries with name, uid and an optional pfp.
+            chunk_size (int, optional): The number of users per INSERT execution.
+        
+        Returns:
+            dict: The success and error counts, with an error per rejected item giving its index and a message.
+        """
+        results = {'errors': [], 'success_count': 0, 'error_count': 0}
+        uids = [item.get('uid') for item in items if isinstance(item, dict) and isinstance(item.get('uid'), str)]
+        taken = {uid for (uid,) in db.session.query(User._uid).filter(User._uid.in_(uids))}
+        password = generate_password_hash(app.config["DEFAULT_PASSWORD"], "pbkdf2:sha256", salt_length=10)
+
+        rows = []
+        for index, item in enumerate(items):
+            name = item.get('name') if isinstance(item, dict) else None
+            uid = item.get('uid') if isinstance(item, dict) else None
+            message = None
+            if not isinstance(name, str) or len(name) < 2:
+                message = 'Name is missing, or is less than 2 characters'
+            elif not isinstance(uid, str) or len(uid) < 2:
+                message = 'User ID is missing, or is less than 2 characters'
+            elif not isinstance(item.get('pfp') or '', str):
+                message = 'Profile picture must be a filename'
+            elif uid in taken:
+                message = f'User ID {uid} is duplicate'
+            if message:
+                results['errors'].append({'index': index, 'message': message})
+                continue
+            taken.add(uid)
+            rows.append({
+                '_name': name,
+                '_uid': uid,
+                '_email': '?',
+                '_password': password,
+                '_role': 'User',
+                '_pfp': item.get('pfp') or '',
+                '_car': ''
+            })
+
+        try:
+            for start in range(0, len(rows), chunk_size):
+                db.session.execute(User.__table__.insert(), rows[start:start + chunk_size])
+            # The executemany insert skips the ORM events, so count the references to stored pictures here
+            adjust_references(db.session, [row['_pfp'] for row in rows], 1)
+            db.session.commit()
+            results['success_count'] = len(rows)
+        except IntegrityError:
+            db.session.rollback()
+            results['errors'].append({'index': None, 'message': 'Database error, no users were created'})
+        results['error_count'] = len(items) - results['success_count']
+        return results
+
+    @staticmethod
+    def avatars(uids, size=64, inline=False):
+        """
+        Returns the profile picture thumbnails of many users at once.
+        
+        Uses:
+            One IN query for the uids and profile pictures, without loading whole user rows.
+        
+        Args:
+            uids (list): The uids of the users.
+            size (int, optional): One of the thumbnail sizes.
+            inline (bool, optional): Return each thumbnail already generated as a base64 data URI rather than
+                a URL, so a page needs no further request for it.
+        
+        Returns:
+            dict: The URL or data URI for each known uid, None for users without a profile picture.
+        """
+        rows = db.session.query(User._uid, User._pfp).filter(User._uid.in_(set(uids))).all() if uids else []
+        avatars = {}
+        for uid, pfp in rows:
+            data_uri = pfp_thumbnail_data_uri(uid, pfp, size) if inline and pfp else None
+            avatars[uid] = data_uri or pfp_url(uid, pfp, size)
+        return avatars
+
     @staticmethod
     def restore(data):
         users = {}
@@ -485,6 +583,9 @@ class User(db.Model, UserMixin):
         return users
 
 
+referenced(User, '_pfp', '_car')
+
+
 """Database Creation and Testing """
 
 def initUsers():
@@ -1,7 +1,13 @@
+from datetime import datetime
 from __init__ import db, app
+from sqlalchemy import event, func, select, update
 from sqlalchemy.exc import IntegrityError
 from model.post import Post
 from model.user import User
+from model.revision import insert_ignore
+
+# Vote type -> the Post column counting it
+COUNTERS = {'upvote': '_upvotes', 'downvote': '_downvotes'}
 
 class Vote(db.Model):
     """
@@ -14,13 +20,21 @@ class Vote(db.Model):
         _vote_type (db.Column): A string representing the type of vote ("upvote" or "downvote").
         _user_id (db.Column): An integer representing the ID of the user who cast the vote.
         _post_id (db.Column): An integer representing the ID of the post that received the vote.
+        _created (db.Column): The time the vote was cast or last changed.
+
+    Each user holds at most one vote per post, and the per post counts are kept on the Post row.
     """
     __tablename__ = 'votes'
+    __table_args__ = (
+        db.UniqueConstraint('_post_id', '_user_id', name='uq_votes_post_id_user_id'),
+        db.Index('ix_votes_user_id_created', '_user_id', '_created'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     _vote_type = db.Column(db.String(10), nullable=False)  # "upvote" or "downvote"
     _user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     _post_id = db.Column(db.Integer, db.ForeignKey('posts.id'), nullable=False)
+    _created = db.Column(db.DateTime, nullable=True, default=datetime.utcnow)
 
     def __init__(self, vote_type, user_id, post_id):
         """
@@ -71,6 +85,117 @@ class Vote(db.Model):
             db.session.rollback()
             raise e
 
+    @staticmethod
+    def cast(post_id, user_id, vote_type):
+        """
+        Records a user's vote on a post, replacing a previous vote of the other type, and adjusts the post's counters.
+
+        Uses:
+            A conditional UPDATE to flip an existing vote, otherwise an INSERT that the unique (post, user) key turns
+            into a no-op for a repeated vote. The row counts tell which case happened, so the counters stay exact
+            even when the same vote arrives twice at once.
+
+        Args:
+            post_id (int): ID of the post being voted on.
+            user_id (int): ID of the user voting.
+            vote_type (str): Type of the vote, either "upvote" or "downvote".
+
+        Returns:
+            dict: The vote information.
+        """
+        table = Vote.__table__
+        connection = db.session.connection()
+        try:
+            flipped = connection.execute(
+                update(table)
+                .where(table.c['_post_id'] == post_id, table.c['_user_id'] == user_id, table.c['_vote_type'] != vote_type)
+                .values(_vote_type=vote_type, _created=datetime.utcnow())
+            ).rowcount
+            if flipped:
+                _count(connection, post_id, 'downvote' if vote_type == 'upvote' else 'upvote', -1)
+                _count(connection, post_id, vote_type, 1)
+            else:
+                inserted = connection.execute(
+                    insert_ignore(connection, table).values(_post_id=post_id, _user_id=user_id, _vote_type=vote_type)
+                ).rowcount
+                if inserted:
+                    _count(connection, post_id, vote_type, 1)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            raise e
+        return Vote.query.filter_by(_post_id=post_id, _user_id=user_id).first().read()
+
+    @staticmethod
+    def batch_status(post_ids, user_id):
+        """
+        Returns the vote counts of several posts along with the given user's own vote on each.
+
+        Uses:
+            One query for the counters stored on the posts and one for the user's votes on those posts.
+
+        Args:
+            post_ids (list): IDs of the posts to describe.
+            user_id (int): ID of the user whose votes are included.
+
+        Returns:
+            list: A dictionary per existing post, in the order of post_ids.
+        """
+        counts = {
+            id: (upvotes, downvotes)
+            for id, upvotes, downvotes in db.session.query(Post.id, Post._upvotes, Post._downvotes).filter(Post.id.in_(post_ids))
+        }
+        own = dict(
+            db.session.query(Vote._post_id, Vote._vote_type).filter(Vote._user_id == user_id, Vote._post_id.in_(list(counts)))
+        ) if counts else {}
+        return [
+            {
+                "post_id": post_id,
+                "upvote_count": counts[post_id][0],
+                "downvote_count": counts[post_id][1],
+                "user_vote": own.get(post_id)
+            }
+            for post_id in dict.fromkeys(post_ids) if post_id in counts
+        ]
+
+    @staticmethod
+    def recount():
+        """
+        Rebuilds the vote counters of every post from the votes table, e.g. after restoring or migrating data.
+        """
+        counts = db.session.query(Vote._post_id, Vote._vote_type, func.count()).group_by(Vote._post_id, Vote._vote_type)
+        db.session.execute(update(Post).values(_upvotes=0, _downvotes=0))
+        for post_id, vote_type, count in counts.all():
+            if vote_type in COUNTERS:
+                db.session.execute(update(Post).where(Post.id == post_id).values({COUNTERS[vote_type]: count}))
+        db.session.commit()
+
+
+def _count(connection, post_id, vote_type, delta):
+    if vote_type not in COUNTERS:
+        return
+    table = Post.__table__
+    column = table.c[COUNTERS[vote_type]]
+    connection.execute(update(table).where(table.c['id'] == post_id).values({column: column + delta}))
+
+@event.listens_for(Vote, 'after_insert')
+def _vote_inserted(mapper, connection, target):
+    _count(connection, target._post_id, target._vote_type, 1)
+
+@event.listens_for(Vote, 'after_delete')
+def _vote_deleted(mapper, connection, target):
+    _count(connection, target._post_id, target._vote_type, -1)
+
+@event.listens_for(Vote, 'before_update')
+def _vote_updated(mapper, connection, target):
+    # Read the stored row, as the previous values are not loaded when the vote was changed after a commit
+    table = Vote.__table__
+    old = connection.execute(select(table.c['_post_id'], table.c['_vote_type']).where(table.c['id'] == target.id)).first()
+    if old is None or tuple(old) == (target._post_id, target._vote_type):
+        return
+    _count(connection, old[0], old[1], -1)
+    _count(connection, target._post_id, target._vote_type, 1)
+
 def initVotes():
     """
     Initialize the Vote table with any required starter data.
@@ -93,3 +218,6 @@ def initVotes():
             except IntegrityError:
                 db.session.rollback()
                 print(f"Duplicate or error: {repr(vote)}")
+
+        # Bring the counters of votes created before they were tracked up to date
+        Vote.recount()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+
+""" bulk_posts_benchmark.py
+Measures how many posts per second the bulk post creation path inserts, then removes the benchmark posts.
+
+Usage: Run from the terminal as such:
+
+Goto the scripts directory:
+> cd scripts; ./bulk_posts_benchmark.py
+
+Or run from the root of the project:
+> scripts/bulk_posts_benchmark.py
+"""
+
+import sys
+import os
+import time
+
+# Add the directory containing main.py to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from main import app, db
+from model.post import Post
+from model.user import User
+from model.channel import Channel
+from model.search import search_index
+
+SIZES = [1000, 100000]
+
+def benchmark(size, user_id, channel_id):
+    """Bulk creates the given number of posts and returns the posts per second."""
+    items = [
+        {'title': f'Benchmark post {i}', 'comment': 'Bulk insert benchmark', 'channel_id': channel_id}
+        for i in range(size)
+    ]
+    first_id = db.session.query(db.func.max(Post.id)).scalar() or 0
+
+    start = time.perf_counter()
+    results = Post.bulk_create(items, user_id)
+    elapsed = time.perf_counter() - start
+
+    # Remove the benchmark posts so the database is left as it was. The bulk delete skips the ORM events,
+    # so the posts are also removed from the search index here.
+    benchmark_posts = Post.query.filter(Post.id > first_id, Post._title.like('Benchmark post %'))
+    post_ids = [id for (id,) in benchmark_posts.with_entities(Post.id)]
+    benchmark_posts.delete(synchronize_session=False)
+    search_index.remove(db.session, 'post', post_ids)
+    db.session.commit()
+
+    if results['error_count']:
+        print(f"{results['error_count']} of {size} posts failed: {results['errors'][:3]}")
+    return results['success_count'] / elapsed
+
+def main():
+    with app.app_context():
+        user = User.query.filter_by(_uid=app.config['ADMIN_USER']).first()
+        channel = Channel.query.first()
+        if user is None or channel is None:
+            print("The database has no admin user or channel, run scripts/db_init.py first.")
+            sys.exit(1)
+
+        for size in SIZES:
+            rate = benchmark(size, user.id, channel.id)
+            print(f"{size:>7} posts: {rate:,.0f} posts/second")
+
+if __name__ == "__main__":
+    main()
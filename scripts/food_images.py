@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+
+""" food_images.py
+Precompresses the food-choice images: saves a WebP copy next to each PNG or JPEG, e.g. apple.png.webp,
+which /api/foodchoice/images sends to browsers that accept WebP. Copies newer than their image are skipped.
+
+Usage: Run from the terminal as such:
+
+Goto the scripts directory:
+> cd scripts; ./food_images.py [folder]
+
+Or run from the root of the project:
+> scripts/food_images.py static/images/food
+"""
+
+import sys
+import os
+from PIL import Image
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
+def precompress(folder):
+    """Writes the missing or outdated WebP copies in folder and returns how many were written."""
+    written = 0
+    for name in sorted(os.listdir(folder)):
+        if not name.lower().endswith(IMAGE_EXTENSIONS):
+            continue
+        img_path = os.path.join(folder, name)
+        webp_path = img_path + '.webp'
+        if os.path.exists(webp_path) and os.path.getmtime(webp_path) >= os.path.getmtime(img_path):
+            continue
+        with Image.open(img_path) as image:
+            # Lossless keeps the flat colours of the illustrations exact, and is still smaller than PNG
+            image.save(webp_path, 'WEBP', lossless=name.lower().endswith('.png'), quality=85, method=6)
+        print(f"{name}: {os.path.getsize(img_path)} -> {os.path.getsize(webp_path)} bytes")
+        written += 1
+    return written
+
+def main():
+    default = os.path.join(os.path.dirname(__file__), '..', 'static', 'images', 'food')
+    folder = sys.argv[1] if len(sys.argv) > 1 else os.environ.get('FOOD_IMAGE_FOLDER', default)
+    if not os.path.isdir(folder):
+        print(f"No food images found in {folder}")
+        return
+    print(f"Wrote {precompress(folder)} WebP copies")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+
+""" search_benchmark.py
+Generates a synthetic corpus and measures query times of both search backends: the SQLite FTS5 table
+and the in-memory inverted index used on other databases. Nothing is written to the app database.
+
+Usage: Run from the terminal as such:
+
+Goto the scripts directory:
+> cd scripts; ./search_benchmark.py [documents]
+
+Or run from the root of the project:
+> scripts/search_benchmark.py 100000
+"""
+
+import sys
+import os
+import random
+import time
+from itertools import accumulate
+
+# Add the directory containing model/ to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import create_engine
+from model.search import FtsIndex, MemoryIndex, parse_query, _key
+
+VOCABULARY_SIZE = 20000
+QUERIES = ['insulin', 'glucose level', 'gluc*', 'carb count meal', 'a*', 'xylophonezebra']
+# A handful of real words mixed into the generated vocabulary so the queries have hits
+COMMON_WORDS = ['glucose', 'glucagon', 'insulin', 'level', 'carb', 'count', 'meal', 'sugar', 'dose', 'exercise']
+
+def generate_corpus(size, seed=42):
+    """Returns size (key, title, body) documents with Zipf distributed words, like real text."""
+    rng = random.Random(seed)
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    vocabulary = [''.join(rng.choice(letters) for _ in range(rng.randint(3, 10))) for _ in range(VOCABULARY_SIZE)]
+    # Place the real words at mid-frequency ranks, where topical words sit, rather than among the stop words
+    for rank, word in enumerate(COMMON_WORDS):
+        vocabulary.insert(100 + rank * 50, word)
+    cum_weights = list(accumulate(1 / rank for rank in range(1, len(vocabulary) + 1)))
+    kinds = ['post', 'nestpost', 'flashcard']
+    corpus = []
+    for doc_id in range(1, size + 1):
+        title = ' '.join(rng.choices(vocabulary, cum_weights=cum_weights, k=rng.randint(2, 8)))
+        body = ' '.join(rng.choices(vocabulary, cum_weights=cum_weights, k=rng.randint(10, 40)))
+        corpus.append((_key(kinds[doc_id % 3], doc_id), title, body))
+    return corpus
+
+def time_queries(search):
+    """Runs every query a few times and returns the average milliseconds per query."""
+    timings = {}
+    for query in QUERIES:
+        terms = parse_query(query)
+        start = time.perf_counter()
+        for _ in range(5):
+            hits = search(terms)
+        timings[query] = ((time.perf_counter() - start) / 5 * 1000, len(hits))
+    return timings
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    print(f"Generating {size} documents...")
+    corpus = generate_corpus(size)
+
+    memory = MemoryIndex()
+    start = time.perf_counter()
+    for key, title, body in corpus:
+        memory.add(key, title, body)
+    print(f"Memory index built in {time.perf_counter() - start:.1f}s")
+    results = {'memory': time_queries(lambda terms: memory.search(terms))}
+
+    fts = FtsIndex()
+    engine = create_engine('sqlite://')
+    with engine.begin() as connection:
+        try:
+            fts.create(connection)
+        except Exception as e:
+            print(f"FTS5 unavailable: {e}")
+            connection = None
+        if connection is not None:
+            start = time.perf_counter()
+            fts.write(connection, corpus)
+            print(f"FTS5 index built in {time.perf_counter() - start:.1f}s")
+            results['fts5'] = time_queries(lambda terms: fts.search(connection, terms))
+
+    for backend, timings in results.items():
+        print(f"\n{backend}")
+        for query, (ms, hits) in timings.items():
+            print(f"  {query:<20} {ms:8.2f} ms  {hits} hits")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+""" conftest.py
+Shared fixtures for the tests, which run against a throwaway SQLite database rather than instance/volumes.
+
+Usage: Run from the root of the project:
+> python -m pytest tests
+"""
+
+import os
+import sys
+import tempfile
+import pytest
+
+# Point the app at a throwaway database before __init__ configures SQLAlchemy
+os.environ['DATABASE_URI'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'test.db')
+# Add the directory containing __init__.py to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from __init__ import app, db
+from sqlalchemy import event
+from api.post import post_api
+
+# Blueprints must be registered before the first request of any test
+app.register_blueprint(post_api)
+
+@pytest.fixture
+def database():
+    """Creates every table for one test and drops them afterwards."""
+    with app.app_context():
+        db.create_all()
+        yield db
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(database):
+    """A test client for the registered blueprints."""
+    return app.test_client()
+
+@pytest.fixture
+def statements(database):
+    """Records the SQL statements run on the database while the test is running."""
+    executed = []
+    listener = lambda conn, cursor, statement, parameters, context, executemany: executed.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    yield executed
+    event.remove(db.engine, 'before_cursor_execute', listener)
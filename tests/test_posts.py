@@ -0,0 +1,38 @@
+from __init__ import db
+from model.channel import Channel
+from model.group import Group
+from model.post import Post
+from model.section import Section
+from model.user import User
+
+def create_posts(start, count, users, channels):
+    """Adds count posts, spreading them over the users and channels so each page has several of both."""
+    for i in range(start, start + count):
+        db.session.add(Post(f'Post {i}', 'Comment', users[i % len(users)].id, channels[i % len(channels)].id))
+    db.session.commit()
+
+def test_posts_listing_query_count_is_constant(client, statements):
+    users = [User(name=f'User {i}', uid=f'user{i}', password='password').create() for i in range(3)]
+    section = Section(name='Section')
+    section.create()
+    group = Group(name='Group', section_id=section.id)
+    group.create()
+    channels = [Channel(name=f'Channel {i}', group_id=group.id) for i in range(2)]
+    for channel in channels:
+        channel.create()
+
+    create_posts(0, 10, users, channels)
+    statements.clear()
+    response = client.get('/api/posts')
+    assert response.status_code == 200
+    assert len(response.get_json()) == 10
+    queries_for_10 = len(statements)
+
+    create_posts(10, 10, users, channels)
+    statements.clear()
+    response = client.get('/api/posts')
+    assert response.status_code == 200
+    posts = response.get_json()
+    assert len(posts) == 20
+    assert all(post['user_name'] and post['channel_name'] for post in posts)
+    assert len(statements) == queries_for_10
@@ -0,0 +1,57 @@
+import random
+import threading
+from sqlalchemy import func, select
+from __init__ import app, db
+from model.channel import Channel
+from model.group import Group
+from model.post import Post
+from model.rating import Rating
+from model.section import Section
+from model.user import User
+
+THREADS = 8
+RATINGS_PER_THREAD = 25
+
+def test_concurrent_ratings_keep_sum_and_count_consistent(database):
+    users = [User(name=f'User {i}', uid=f'user{i}', password='password').create() for i in range(5)]
+    section = Section(name='Section')
+    section.create()
+    group = Group(name='Group', section_id=section.id)
+    group.create()
+    channel = Channel(name='Channel', group_id=group.id)
+    channel.create()
+    post = Post('Rated post', 'Comment', users[0].id, channel.id)
+    post.create()
+    post_id, user_ids = post.id, [user.id for user in users]
+
+    start = threading.Barrier(THREADS)
+    errors = []
+
+    def rate(seed):
+        # Several threads rate as the same users at once, so new ratings and changed ratings race each other
+        rng = random.Random(seed)
+        with app.app_context():
+            start.wait()
+            try:
+                for _ in range(RATINGS_PER_THREAD):
+                    Rating.rate(post_id, rng.choice(user_ids), rng.randint(1, 5))
+            except Exception as e:
+                errors.append(e)
+            finally:
+                db.session.remove()
+
+    threads = [threading.Thread(target=rate, args=(seed,)) for seed in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+
+    db.session.expire_all()
+    post = db.session.get(Post, post_id)
+    star_sum, star_count = db.session.execute(
+        select(func.coalesce(func.sum(Rating._stars), 0), func.count(Rating.id)).where(Rating._post_id == post_id)
+    ).one()
+    assert star_count == len(user_ids)
+    assert post._star_count == star_count
+    assert post._star_sum == star_sum
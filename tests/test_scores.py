@@ -0,0 +1,35 @@
+import random
+import pytest
+import model.scores
+from model.scores import Score, TopScores
+from model.user import User
+
+def expected(limit):
+    """The leaderboard as the SQL orders it: points descending, ties broken by id."""
+    return [(score.id, score.points) for score in
+            Score.query.order_by(Score.points.desc(), Score.id.asc()).limit(limit).all()]
+
+def indexed(top_scores, limit):
+    return [(row['id'], row['points']) for row in top_scores.top(limit)]
+
+@pytest.mark.parametrize('capacity', [100, 5])
+def test_top_scores_match_sql_ordering(database, monkeypatch, capacity):
+    # A fresh index per test, the revisions start over with the recreated database
+    top_scores = TopScores(capacity=capacity)
+    monkeypatch.setattr(model.scores, 'top_scores', top_scores)
+    rng = random.Random(capacity)
+    users = [User(name=f'User {i}', uid=f'user{i}', password='password').create() for i in range(3)]
+
+    # Few distinct points so that many scores tie
+    scores = [Score(users[i % len(users)].id, rng.choice([10, 20, 30]), 1).create() for i in range(12)]
+    assert indexed(top_scores, capacity) == expected(capacity)
+
+    for step in range(30):
+        action = rng.choice(['create', 'update', 'delete'])
+        if action == 'create' or not scores:
+            scores.append(Score(rng.choice(users).id, rng.choice([10, 20, 30, 40]), 1).create())
+        elif action == 'update':
+            rng.choice(scores).update(points=rng.choice([5, 10, 20, 30, 40]))
+        else:
+            scores.pop(rng.randrange(len(scores))).delete()
+        assert indexed(top_scores, capacity) == expected(capacity), f'step {step}: {action}'